@@ -18,9 +18,12 @@ Created on Thu Mar 26 21:51:00 2020
 @author: Tobias Hossfeld
 """
 
-from scipy.stats import beta, rv_discrete
+# scipy and pandas are imported on first use to keep the import of the module lightweight:
+# scipy.special for evaluating the Beta CDF/PDF, scipy.stats only when a frozen distribution 
+# is requested and pandas only for ratings provided as Pandas dataframe or csv file.
+from functools import lru_cache
+import sys
 import numpy as np
-import pandas as pd
 
 #%% Derive SOS parameters from measurements
 def calcSOSParameterForMOSSOS(mos, sos, low=1, high=5):  
@@ -68,13 +71,338 @@ def calcSOSParameter(y, low=1, high=5):
         TypeError: If y is not provided as Numpy array or Pandas DataFrame        
     """
     if type(y) is np.ndarray:        
-        return calcSOSParameterForMOSSOS(y.mean(axis=1),y.std(axis=1))
-    elif type(y) is pd.DataFrame:
+        return calcSOSParameterForMOSSOS(y.mean(axis=1),y.std(axis=1), low=low, high=high)
+    elif 'pandas' in sys.modules and type(y) is sys.modules['pandas'].DataFrame:
         vals = y.groupby(by='condition')["rating"]        
-        return calcSOSParameterForMOSSOS(vals.mean(),vals.std())
+        return calcSOSParameterForMOSSOS(vals.mean(),vals.std(), low=low, high=high)
     else:
         raise TypeError("QoE ratings y must be given as numpy array or pandas dataframe")
 
+class SOSParameterEstimator:
+    """ 
+    Derives the SOS parameter a from subjective measurements which are processed in chunks, e.g. rating 
+    logs which do not fit into memory. For each test condition, the number of ratings, the sum of ratings 
+    and the sum of squared ratings are kept as sufficient statistics. Estimators from parallel readers 
+    can be merged and their state can be serialized.
+    
+    Parameters:
+        low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        ddof (int): Delta degrees of freedom for the SOS per condition. ddof=1 corresponds to 
+            calcSOSParameter for a Pandas dataframe, ddof=0 to calcSOSParameter for a Numpy array.
+    """ 
+    def __init__(self, low=1, high=5, ddof=1):
+        self.low, self.high, self.ddof = low, high, ddof
+        self.conditions = np.array([])
+        self.count = np.zeros(0)
+        self.sum = np.zeros(0)
+        self.sumsq = np.zeros(0)
+        
+    def _update(self, conditions, count, rsum, rsumsq):
+        allConditions = np.union1d(self.conditions, conditions)
+        newCount, newSum, newSumsq = np.zeros(len(allConditions)), np.zeros(len(allConditions)), np.zeros(len(allConditions))
+        for idx, c, s, q in ((np.searchsorted(allConditions, self.conditions), self.count, self.sum, self.sumsq), 
+                             (np.searchsorted(allConditions, conditions), count, rsum, rsumsq)):
+            newCount[idx] += c
+            newSum[idx] += s
+            newSumsq[idx] += q
+        self.conditions, self.count, self.sum, self.sumsq = allConditions, newCount, newSum, newSumsq
+        
+    def add(self, condition, rating):
+        """ 
+        Adds a chunk of individual ratings.
+        
+        Parameters:
+            condition (numpy.ndarray): Test condition of each rating.
+            rating (numpy.ndarray): Individual ratings on the [low;high] rating scale.
+            
+        Returns:
+            SOSParameterEstimator: The estimator itself.
+        """ 
+        rating = np.ravel(rating).astype(float)
+        conditions, inv = np.unique(np.ravel(condition), return_inverse=True)
+        self._update(conditions, np.bincount(inv, minlength=len(conditions)), 
+                     np.bincount(inv, weights=rating, minlength=len(conditions)), 
+                     np.bincount(inv, weights=rating**2, minlength=len(conditions)))
+        return self
+    
+    def addDataFrame(self, df):
+        """ 
+        Adds the ratings of a Pandas dataframe with a column 'rating' and a column 'condition', 
+        see calcSOSParameter.
+        
+        Returns:
+            SOSParameterEstimator: The estimator itself.
+        """ 
+        return self.add(df['condition'].to_numpy(), df['rating'].to_numpy())
+    
+    def addCSV(self, filepath, chunksize=1000000, **kwargs):
+        """ 
+        Reads the ratings from a csv file in chunks. The file must contain a column 'rating' and a 
+        column 'condition', see calcSOSParameter. 
+        
+        Parameters:
+            filepath (str): Path of the csv file.
+            chunksize (int): Number of lines which are read at once.
+            kwargs: Further arguments passed to pandas.read_csv.
+            
+        Returns:
+            SOSParameterEstimator: The estimator itself.
+        """ 
+        import pandas as pd
+        for df in pd.read_csv(filepath, chunksize=chunksize, usecols=['condition', 'rating'], **kwargs):
+            self.addDataFrame(df)
+        return self
+    
+    def merge(self, other):
+        """ 
+        Merges the statistics of another estimator into this estimator.
+        
+        Parameters:
+            other (SOSParameterEstimator): Estimator with the same rating scale.
+            
+        Returns:
+            SOSParameterEstimator: The estimator itself.
+            
+        Raises: 
+            ValueError: If the estimators use different rating scales or degrees of freedom.
+        """ 
+        if (self.low, self.high, self.ddof) != (other.low, other.high, other.ddof):
+            raise ValueError('Only estimators with the same rating scale and degrees of freedom can be merged.')
+        self._update(other.conditions, other.count, other.sum, other.sumsq)
+        return self
+    
+    def getState(self):
+        """ 
+        Returns the state of the estimator as a dictionary of Python numbers and lists, 
+        which can be serialized e.g. with json.dumps.
+        
+        Returns:
+            dict: State of the estimator.
+        """ 
+        return dict(low=self.low, high=self.high, ddof=self.ddof, conditions=self.conditions.tolist(), 
+                    count=self.count.tolist(), sum=self.sum.tolist(), sumsq=self.sumsq.tolist())
+    
+    @classmethod
+    def fromState(cls, state):
+        """ 
+        Creates an estimator from a state returned by getState.
+        
+        Returns:
+            SOSParameterEstimator: The restored estimator.
+        """ 
+        est = cls(low=state['low'], high=state['high'], ddof=state['ddof'])
+        est._update(np.array(state['conditions']), np.array(state['count'], dtype=float), 
+                    np.array(state['sum'], dtype=float), np.array(state['sumsq'], dtype=float))
+        return est
+    
+    def getMOSSOS(self):
+        """ 
+        Returns MOS and SOS of all test conditions with more than ddof ratings.
+        
+        Returns:
+            (conditions, mos, sos): Tuple of Numpy arrays with the test conditions and their MOS and SOS values.
+        """ 
+        valid = self.count > self.ddof
+        n, s, q = self.count[valid], self.sum[valid], self.sumsq[valid]
+        mos = s/n
+        sos = np.sqrt(np.maximum(q - s*mos, 0)/(n-self.ddof))
+        return (self.conditions[valid], mos, sos)
+    
+    def calcSOSParameter(self):
+        """ 
+        Derives the SOS parameter a from the statistics of all ratings added so far.
+        
+        Returns:
+            float: SOS parameter a
+        """ 
+        _, mos, sos = self.getMOSSOS()
+        return calcSOSParameterForMOSSOS(mos, sos, low=self.low, high=self.high)
+
+def _calcSOSParameterForMOSSOSBatch(mos, sos, low, high):
+    """ 
+    Derives the SOS parameter a along the last axis of arrays of MOS and SOS values, see calcSOSParameterForMOSSOS. 
+    Conditions with undefined SOS (nan) are skipped in the numerator like for Pandas series.
+    """ 
+    zmos = (mos-low)/(high-low)
+    zvar = (sos/(high-low))**2
+    return np.nansum( (zmos - zmos**2)*zvar, axis=-1) / (np.sum( (zmos - zmos**2)**2, axis=-1 ))    
+
+def calcSOSParameterBootstrap(y, replicates=1000, confidence=0.95, low=1, high=5, resample=None, seed=None, max_bytes=2**28):
+    """ 
+    Derives SOS parameter a from subjective measurements together with a bootstrap confidence interval. 
+    All bootstrap replicates are drawn and evaluated at once in vectorized form. To bound the memory, 
+    the replicates are processed in blocks.
+    
+    Parameters:
+        y (numpy.ndarray or pandas.DataFrame): QoE ratings on a scale from [low;high], see calcSOSParameter.
+        replicates (int): Number of bootstrap replicates.
+        confidence (float): Confidence level of the percentile confidence interval, e.g. 0.95.
+        low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        resample (str): 'users' resamples the users, i.e. the columns of the Numpy array y, for all conditions 
+            jointly. 'ratings' resamples the ratings of each condition independently. If None, 'users' is used 
+            for a Numpy array and 'ratings' for a Pandas dataframe, which only supports 'ratings'.
+        seed (int): Seed of the random number generator numpy.random.default_rng.
+        max_bytes (int): Approximate upper bound of the memory used for the resampled ratings of one block.
+                  
+    Returns:
+        (a, (lower, upper), a_boot): Tuple of the SOS parameter a, the bounds of the confidence interval 
+            and a Numpy array of the SOS parameters of all bootstrap replicates.
+        
+    Raises:
+        TypeError: If y is not provided as Numpy array or Pandas DataFrame        
+        ValueError: If the resampling method is unknown or not supported for the data layout.
+    """
+    rng = np.random.default_rng(seed)
+    a_boot = np.empty(replicates)
+    a = calcSOSParameter(y, low=low, high=high)
+    
+    if type(y) is np.ndarray:        
+        resample = 'users' if resample is None else resample
+        if resample not in ('users', 'ratings'):
+            raise ValueError("Resampling method must be 'users' or 'ratings'.")
+        conditions, users = y.shape
+        block = max(1, int(max_bytes // (8*conditions*users)))
+        for start in range(0, replicates, block):
+            r = min(block, replicates-start)
+            if resample == 'users':
+                # replicates x conditions x users
+                sample = np.moveaxis(y[:, rng.integers(0, users, size=(r, users))], 0, 1)
+            else:
+                sample = np.take_along_axis(y[None], rng.integers(0, users, size=(r, conditions, users)), axis=2)
+            a_boot[start:start+r] = _calcSOSParameterForMOSSOSBatch(sample.mean(axis=-1), sample.std(axis=-1), low, high)
+            
+    elif 'pandas' in sys.modules and type(y) is sys.modules['pandas'].DataFrame:
+        resample = 'ratings' if resample is None else resample
+        if resample != 'ratings':
+            raise ValueError("Resampling method must be 'ratings' for a Pandas dataframe.")
+        conditions, ci = np.unique(y['condition'].to_numpy(), return_inverse=True)
+        values, vi = np.unique(y['rating'].to_numpy(), return_inverse=True)
+        counts = np.bincount(ci*len(values)+vi, minlength=len(conditions)*len(values)).reshape(len(conditions), len(values))
+        n = counts.sum(axis=1)
+        block = max(1, int(max_bytes // (8*len(conditions)*len(values))))
+        for start in range(0, replicates, block):
+            r = min(block, replicates-start)
+            # replicates x conditions x rating values
+            c = rng.multinomial(n, counts/n[:, None], size=(r, len(conditions)))
+            mos = (c*values).sum(axis=-1)/n
+            with np.errstate(invalid='ignore', divide='ignore'):
+                sos = np.sqrt(np.maximum((c*values**2).sum(axis=-1) - n*mos**2, 0)/(n-1))
+            a_boot[start:start+r] = _calcSOSParameterForMOSSOSBatch(mos, sos, low, high)
+    else:
+        raise TypeError("QoE ratings y must be given as numpy array or pandas dataframe")
+    
+    lower, upper = np.quantile(a_boot, [(1-confidence)/2, (1+confidence)/2])
+    return (a, (lower, upper), a_boot)
+
+def _getRatingCounts(y, low, high):
+    """ 
+    Returns the histograms of the discrete ratings per test condition as matrix of shape 
+    (#conditions, high-low+1). Missing ratings (nan) and conditions without ratings are skipped.
+    """ 
+    K = high-low+1
+    if type(y) is np.ndarray:
+        y = np.asarray(y, dtype=float)
+        cond = np.broadcast_to(np.arange(y.shape[0])[:, None], y.shape)
+        valid = ~np.isnan(y)
+        ratings, cond, C = y[valid], cond[valid], y.shape[0]
+    elif 'pandas' in sys.modules and type(y) is sys.modules['pandas'].DataFrame:
+        # rows with a missing condition have the group code nan (or -1 in older pandas versions)
+        cond = np.nan_to_num(y.groupby(by='condition').ngroup().to_numpy(dtype=float), nan=-1).astype(np.intp)
+        ratings = y['rating'].to_numpy(dtype=float)
+        valid = (cond >= 0) & ~np.isnan(ratings)
+        ratings, cond = ratings[valid], cond[valid]
+        C = cond.max()+1 if len(cond) else 0
+    else:
+        raise TypeError("QoE ratings y must be given as numpy array or pandas dataframe")
+    k = ratings-low
+    if np.any((k != np.round(k)) | (k < 0) | (k > K-1)):
+        raise ValueError('QoE ratings must be integers in the range [low;high].')
+    counts = np.bincount(cond*K + k.astype(np.intp), minlength=C*K).reshape(C, K)
+    return counts[counts.sum(axis=1) > 0]
+
+def _getLogLikelihoodSOS(a, counts, mos, dataset, low, high):
+    """ 
+    Returns the log-likelihood of the rating histograms of each dataset for the SOS parameters a 
+    (one per dataset). The discrete distributions of all conditions are evaluated in one vectorized pass.
+    """ 
+    from scipy.special import xlogy
+    alpha, beta = _getBetaParams(mos, a[dataset], low, high)
+    zk = np.arange(low-0.5,high+1.5, step=1)
+    zk[0], zk[-1] = low, high
+    bcdf = _getBetaCDFMatrix((zk-low)/(high-low), alpha, beta, isLow=(mos==low), isHigh=(mos==high))
+    bcdf[:, 0], bcdf[:, -1] = 0, 1
+    pk = np.maximum(np.diff(bcdf, axis=1), 0)
+    return np.bincount(dataset, weights=xlogy(counts, pk).sum(axis=1), minlength=len(a))
+
+def calcSOSParameterML(y, low=1, high=5, bounds=(1e-6, 1-1e-6), xtol=1e-8):
+    """ 
+    Derives SOS parameter a from subjective measurements by maximizing the likelihood of the observed 
+    rating counts under the discrete Beta approximation, see getDiscreteDistributionArrays. The MOS of each 
+    test condition is the mean of its ratings. In contrast to calcSOSParameter, which fits the MOS-SOS 
+    relationship by least squares, the shape of the rating distributions is taken into account. 
+    
+    Several independent datasets, e.g. different studies or services, are fitted in a single call: 
+    the log-likelihoods of all datasets are evaluated in one vectorized pass and maximized by a 
+    golden-section search on the interval bounds, which runs for all datasets simultaneously. 
+    The standard error of a is derived from the observed Fisher information, i.e. the numerical second 
+    derivative of the log-likelihood at its maximum.
+    
+    Parameters:
+        y (numpy.ndarray, pandas.DataFrame or list): QoE ratings on a scale from [low;high], see calcSOSParameter. 
+            The ratings must be integers; missing ratings in a Numpy array may be given as nan. 
+            A list of such datasets is fitted independently.
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        bounds (tuple): Lower and upper bound of the SOS parameter a within (0;1).
+        xtol (float): Absolute tolerance of the SOS parameter a.
+                  
+    Returns:
+        (a, se): Tuple of the SOS parameter a and its standard error. Numpy arrays with one value per dataset 
+            if y is a list. The values are nan for a dataset in which all conditions have MOS low or high, 
+            since their likelihood does not depend on a. The standard error is nan if a is at a bound.
+        
+    Raises:
+        TypeError: If y is not provided as Numpy array or Pandas DataFrame        
+        ValueError: If the ratings are not integers in [low;high]. If the bounds are not within (0;1).
+    """
+    if not 0 < bounds[0] < bounds[1] < 1:
+        raise ValueError('Bounds of the SOS parameter must be within (0;1).')
+    datasets = y if isinstance(y, (list, tuple)) else [y]
+    counts = [_getRatingCounts(yi, low, high) for yi in datasets]
+    dataset = np.repeat(np.arange(len(counts)), [len(c) for c in counts])
+    counts = np.concatenate(counts) if counts else np.zeros((0, high-low+1), dtype=int)
+    mos = counts @ np.arange(low, high+1) / counts.sum(axis=1)
+    # degenerate conditions (all ratings low or all high) do not depend on a 
+    inner = (mos > low) & (mos < high)
+    counts, mos, dataset = counts[inner], mos[inner], dataset[inner]
+    loglik = lambda a: _getLogLikelihoodSOS(a, counts, mos, dataset, low, high)
+    
+    # golden-section search for the maximum of the log-likelihood of all datasets in parallel
+    invphi = (np.sqrt(5)-1)/2
+    lo, hi = np.full(len(datasets), float(bounds[0])), np.full(len(datasets), float(bounds[1]))
+    c, d = hi-invphi*(hi-lo), lo+invphi*(hi-lo)
+    fc, fd = loglik(c), loglik(d)
+    while np.max(hi-lo, initial=0) > xtol:
+        left = fc >= fd # the maximum is in [lo;d]
+        hi, lo = np.where(left, d, hi), np.where(left, lo, c)
+        x = np.where(left, hi-invphi*(hi-lo), lo+invphi*(hi-lo))
+        fx = loglik(x)
+        c, d, fc, fd = np.where(left, x, d), np.where(left, c, x), np.where(left, fx, fd), np.where(left, fc, fx)
+    a = (lo+hi)/2
+    
+    # standard error from the observed Fisher information 
+    h = np.minimum(1e-4, np.minimum(a-bounds[0], bounds[1]-a)/2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        info = -(loglik(a+h) - 2*loglik(a) + loglik(a-h))/h**2
+        se = np.where(info > 0, 1/np.sqrt(info), np.nan)
+    informative = np.bincount(dataset, minlength=len(datasets)) > 0
+    a, se = np.where(informative, a, np.nan), np.where(informative, se, np.nan)
+    if isinstance(y, (list, tuple)):
+        return (a, se)
+    return (a[0], se[0])
+
 #%% Returns the parameters of the Beta distribution 
 def getBetaParamsForMOSSOS(mos, sos, low=1, high=5):
     """ 
@@ -154,11 +482,94 @@ def getBetaParams(mos, sos_parameter=0.25, low=1, high=5):
         smaller than the lower bound 'low'. If MOS is not in range [low;high].
     """    
     checkParameters(mos=mos, sos_parameter=sos_parameter, low=low, high=high)   
-        
+    return _getBetaParams(mos, sos_parameter, low, high)
+
+def _getBetaParams(mos, sos_parameter, low, high):
     a = (1-sos_parameter)*(mos-low)/((high-low)*sos_parameter)
     b = (1-sos_parameter)*(high-mos)/((high-low)*sos_parameter)
     return a, b
 
+def _betaCDF(z, a, b):
+    """ 
+    CDF of the Beta distribution with parameters a,b>0 at z in [0;1] via the regularized incomplete beta function.
+    """ 
+    from scipy.special import betainc
+    return betainc(a, b, z)
+
+def _betaPDF(z, a, b):
+    """ 
+    PDF of the Beta distribution with parameters a,b at z in [0;1]. Returns nan if a<=0 or b<=0.
+    """ 
+    from scipy.special import betaln, xlogy, xlog1py
+    if a <= 0 or b <= 0:
+        return np.nan
+    return np.exp(xlogy(a-1, z) + xlog1py(b-1, -z) - betaln(a, b))
+
+#%% optional memoization of the Beta distributions and discrete distributions for repeated MOS values
+class _DistributionCache:
+    """ 
+    Size-bounded LRU caches for getBetaDistribution, getDiscreteDistribution and getDiscreteDistributionArrays.
+    """ 
+    def __init__(self, maxsize, decimals):
+        self.maxsize, self.decimals = maxsize, decimals
+        # the functions are looked up in the module on each cache miss, e.g. to call instrumented functions, see Profiler
+        self.beta = lru_cache(maxsize=maxsize)(lambda *args: _getBetaDistribution(*args))
+        self.discrete = lru_cache(maxsize=maxsize)(lambda *args: _getDiscreteDistribution(*args))
+        self.arrays = lru_cache(maxsize=maxsize)(lambda *args: _getDiscreteDistributionArrays(*args))
+        
+    def round(self, mos):
+        return float(mos) if self.decimals is None else round(float(mos), self.decimals)
+    
+_cache = None
+
+def enableCache(maxsize=4096, decimals=None):
+    """ 
+    Enables the memoization of the Beta distributions and discrete distributions which are returned by 
+    getBetaDistribution, getDiscreteDistribution and getDiscreteDistributionArrays. Repeated evaluations 
+    for the same MOS value, SOS parameter and rating scale reuse the already computed distributions. 
+    A previously enabled cache is discarded.
+    
+    Parameters:
+        maxsize (int): Maximum number of entries for each of the three cached functions. 
+            The least recently used entries are discarded. If None, the cache is unbounded.
+        decimals (int): If provided, the MOS values are rounded to the given number of decimals before 
+            the distributions are computed, e.g. for MOS values obtained from quantized QoS values. 
+            The returned distributions are then those of the rounded MOS values.
+    """ 
+    global _cache
+    _cache = _DistributionCache(maxsize, decimals)
+
+def disableCache():
+    """ 
+    Disables the memoization of the distributions and discards all cached entries.
+    """ 
+    global _cache
+    _cache = None
+
+def clearCache():
+    """ 
+    Discards all cached distributions and resets the hit/miss statistics. The cache stays enabled.
+    """ 
+    if _cache is not None:
+        _cache.beta.cache_clear()
+        _cache.discrete.cache_clear()
+        _cache.arrays.cache_clear()
+
+def getCacheInfo():
+    """ 
+    Returns the statistics of the cache.
+    
+    Returns:
+        dict: For the keys 'getBetaDistribution', 'getDiscreteDistribution' and 'getDiscreteDistributionArrays', 
+            a named tuple (hits, misses, maxsize, currsize) as provided by functools.lru_cache. 
+            None if the cache is disabled.
+    """ 
+    if _cache is None:
+        return None
+    return {'getBetaDistribution': _cache.beta.cache_info(), 
+            'getDiscreteDistribution': _cache.discrete.cache_info(), 
+            'getDiscreteDistributionArrays': _cache.arrays.cache_info()}
+
 #%% for a given SOS parameter and a MOS value mean, the continuous Beta distribution (PDF, CDF, distribution) is provided
 def getBetaCDF(x, mos, sos_parameter=0.25, low=1, high=5):
     """ 
@@ -186,12 +597,16 @@ def getBetaCDF(x, mos, sos_parameter=0.25, low=1, high=5):
         raise ValueError('x must be in the range [low;high].')    
         
     if mos==high:
+        if _profiler is not None:
+            _profiler.addEdgeHits('getBetaCDF', high=1)
         return 0 if x<high else 1
     elif mos==low:
+        if _profiler is not None:
+            _profiler.addEdgeHits('getBetaCDF', low=1)
         return 1
     else:        
-        a,b = getBetaParams(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
-        return beta.cdf((x-low)/(high-low),a,b)  
+        a,b = _getBetaParams(mos, sos_parameter, low, high)
+        return _betaCDF((x-low)/(high-low),a,b)  
     
 def getBetaPDF(x, mos, sos_parameter=0.25, low=1, high=5):
     """ 
@@ -217,8 +632,8 @@ def getBetaPDF(x, mos, sos_parameter=0.25, low=1, high=5):
     if x<low or x>high:
         raise ValueError('x must be in the range [low;high].')   
                
-    a,b = getBetaParams(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
-    return beta.pdf((x-low)/(high-low),a,b)    
+    a,b = _getBetaParams(mos, sos_parameter, low, high)
+    return _betaPDF((x-low)/(high-low),a,b)    
     
 def getBetaDistribution(mos, sos_parameter=0.25, low=1, high=5):
     """ 
@@ -239,11 +654,16 @@ def getBetaDistribution(mos, sos_parameter=0.25, low=1, high=5):
         smaller than the lower bound 'low'. If MOS or x is not in range [low;high].
     """ 
     checkParameters(mos=mos, sos_parameter=sos_parameter, low=low, high=high) 
-             
-    a,b = getBetaParams(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
+    if _cache is not None:
+        return _cache.beta(_cache.round(mos), sos_parameter, low, high)
+    return _getBetaDistribution(mos, sos_parameter, low, high)
+
+def _getBetaDistribution(mos, sos_parameter, low, high):
+    from scipy.stats import beta
+    a,b = _getBetaParams(mos, sos_parameter, low, high)
     return beta(a,b, loc=low, scale=high-low)     
 
-def getPoW(mos, sos_parameter=0.25, low=1, high=5, PoW=2.5):
+def getPoW(mos, sos_parameter=0.25, low=1, high=5, PoW=2.5, table=None):
     """ 
     Returns the poor or worse ratio P(X <= PoW) of the Beta distribution X approximating the rating distribution
     given MOS and SOS parameter on [low;high] rating scale.
@@ -254,19 +674,27 @@ def getPoW(mos, sos_parameter=0.25, low=1, high=5, PoW=2.5):
         low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
         high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
         PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the value is interpolated from the precomputed table.
                   
     Returns:
         float: CDF value P(X <= PoW) of the Beta distribuiton X approximation.    
     """     
+    if table is not None:
+        table.checkCompatible(sos_parameter=sos_parameter, low=low, high=high, PoW=PoW)
+        return table.getQoEArrays(mos)[2][0]
         
     if mos==high:
+        if _profiler is not None:
+            _profiler.addEdgeHits('getPoW', high=1)
         return 0 
     elif mos==low:
+        if _profiler is not None:
+            _profiler.addEdgeHits('getPoW', low=1)
         return 1
     else:        
         return getBetaCDF(PoW, mos=mos, sos_parameter=sos_parameter, low=low, high=high)        
     
-def getGoB(mos, sos_parameter=0.25, low=1, high=5, GoB=3.5):
+def getGoB(mos, sos_parameter=0.25, low=1, high=5, GoB=3.5, table=None):
     """ 
     Returns the good or better ratio P(X >= GoB) of the Beta distribution X approximating the rating distribution
     given MOS and SOS parameter on [low;high] rating scale.
@@ -277,19 +705,27 @@ def getGoB(mos, sos_parameter=0.25, low=1, high=5, GoB=3.5):
         low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
         high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
         PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the value is interpolated from the precomputed table.
                   
     Returns:
         float: Good or better ratio P(X >= GoB) of the Beta distribuiton X approximation.    
     """     
+    if table is not None:
+        table.checkCompatible(sos_parameter=sos_parameter, low=low, high=high, GoB=GoB)
+        return table.getQoEArrays(mos)[3][0]
         
     if mos==high:
+        if _profiler is not None:
+            _profiler.addEdgeHits('getGoB', high=1)
         return 1 
     elif mos==low:
+        if _profiler is not None:
+            _profiler.addEdgeHits('getGoB', low=1)
         return 0
     else:        
         return 1-getBetaCDF(GoB, mos=mos, sos_parameter=sos_parameter, low=low, high=high)     
 #%% get the discrete rating distribution, e.g. on a 5-point scale, based on the Beta approximation
-def getDiscreteDistributionArrays(mos, sos_parameter=0.25, low=1, high=5):
+def getDiscreteDistributionArrays(mos, sos_parameter=0.25, low=1, high=5, table=None):
     """ 
     Returns the discrete distribution X approximating the rating distribution
     given MOS and SOS parameter on a discrete rating scale from low to high.
@@ -299,6 +735,7 @@ def getDiscreteDistributionArrays(mos, sos_parameter=0.25, low=1, high=5):
         sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
         low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
         high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        table (BetaLookupTable): If provided, the probabilities are interpolated from the precomputed table.
                   
     Returns:
         (xk, pk): Tuple of an Numpy array of discrete values xk and corresponding probabilites pk (Numpy array)
@@ -308,23 +745,36 @@ def getDiscreteDistributionArrays(mos, sos_parameter=0.25, low=1, high=5):
         smaller than the lower bound 'low'. If MOS or x is not in range [low;high].
     """ 
     checkParameters(mos=mos, sos_parameter=sos_parameter, low=low, high=high) 
-    
+    if table is not None:
+        table.checkCompatible(sos_parameter=sos_parameter, low=low, high=high)
+        xk, pk, _, _ = table.getQoEArrays(mos)
+        return (xk, pk[0])
+    if _cache is not None:
+        xk, pk = _cache.arrays(_cache.round(mos), sos_parameter, low, high)
+        return (xk.copy(), pk.copy())
+    return _getDiscreteDistributionArrays(mos, sos_parameter, low, high)
+
+def _getDiscreteDistributionArrays(mos, sos_parameter, low, high):
     xk = np.arange(low,high+1)    
     
     if mos==high:
+        if _profiler is not None:
+            _profiler.addEdgeHits('_getDiscreteDistributionArrays', high=1)
         pk = np.zeros(high+1-low)
         pk[-1] = 1
         return (xk, pk)
     elif mos==low:
+        if _profiler is not None:
+            _profiler.addEdgeHits('_getDiscreteDistributionArrays', low=1)
         pk = np.zeros(high+1-low)
         pk[0] = 1
         return (xk, pk)
     else:                
-        rv_cont = getBetaDistribution(mos=mos, sos_parameter=sos_parameter, low=low, high=high)        
+        a,b = _getBetaParams(mos, sos_parameter, low, high)
         
         zk = np.arange(low-0.5,high+1.5, step=1)
         zk[0], zk[-1] = low, high
-        bcdf = rv_cont.cdf(zk)
+        bcdf = _betaCDF((zk-low)/(high-low),a,b)
         pk = np.diff(bcdf)
         return (xk, pk)
 #%% get the discrete rating distribution, e.g. on a 5-point scale, based on the Beta approximation
@@ -346,5 +796,1585 @@ def getDiscreteDistribution(mos, sos_parameter=0.25, low=1, high=5):
         ValueError: If SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
         smaller than the lower bound 'low'. If MOS or x is not in range [low;high].
     """ 
+    checkParameters(mos=mos, sos_parameter=sos_parameter, low=low, high=high) 
+    if _cache is not None:
+        return _cache.discrete(_cache.round(mos), sos_parameter, low, high)
+    return _getDiscreteDistribution(mos, sos_parameter, low, high)
+
+def _getDiscreteDistribution(mos, sos_parameter, low, high):
+    from scipy.stats import rv_discrete
     (xk,pk) = getDiscreteDistributionArrays(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
     return rv_discrete(values=(xk, pk)) 
+
+#%% low-overhead evaluation of the Beta approximation for single MOS values, e.g. for per-session scoring
+class BetaScalarEngine:
+    """ 
+    Low-overhead evaluation of the Beta approximation for single MOS values and a fixed SOS parameter, 
+    rating scale and thresholds. The parameters are validated once when the engine is created, and each 
+    query only checks the MOS value. The CDF and PDF are computed directly from the Beta parameters (a,b) 
+    with the regularized incomplete beta function instead of scipy.stats. The results match getBetaCDF, 
+    getBetaPDF, getPoW, getGoB and getDiscreteDistributionArrays up to floating-point precision.
+    
+    Parameters:
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        
+    Raises: 
+        ValueError: If SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If PoW or GoB is not in range [low;high].
+    """ 
+    def __init__(self, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5):
+        checkParameters(mos=low, sos_parameter=sos_parameter, low=low, high=high)
+        if PoW<low or PoW>high or GoB<low or GoB>high:
+            raise ValueError('PoW and GoB must be in the range [low;high].')    
+        self.sos_parameter, self.low, self.high, self.PoW, self.GoB = sos_parameter, low, high, PoW, GoB
+        self._zPoW = (PoW-low)/(high-low)
+        self._zGoB = (GoB-low)/(high-low)
+        zk = np.arange(low-0.5,high+1.5, step=1)
+        zk[0], zk[-1] = low, high
+        self._zk = (zk-low)/(high-low)
+        self.xk = np.arange(low,high+1)
+        from scipy.special import betainc
+        self._betainc = betainc
+    
+    def _checkMOS(self, mos):
+        if mos>self.high or mos<self.low:
+            raise ValueError('MOS value must be in the range [low;high].')    
+    
+    def _checkX(self, x):
+        if x<self.low or x>self.high:
+            raise ValueError('x must be in the range [low;high].')    
+            
+    def getBetaParams(self, mos):
+        """ 
+        Returns the parameters (a,b) of the Beta distribution for the given MOS value, see getBetaParams.
+        """ 
+        self._checkMOS(mos)
+        return _getBetaParams(mos, self.sos_parameter, self.low, self.high)
+    
+    def getBetaCDF(self, x, mos):
+        """ 
+        Returns the CDF value P(X <= x) of the Beta distribution for the given MOS value, see getBetaCDF.
+        """ 
+        self._checkMOS(mos)
+        self._checkX(x)
+        if mos==self.high:
+            return 0 if x<self.high else 1
+        elif mos==self.low:
+            return 1
+        a,b = _getBetaParams(mos, self.sos_parameter, self.low, self.high)
+        return self._betainc(a, b, (x-self.low)/(self.high-self.low))
+    
+    def getBetaPDF(self, x, mos):
+        """ 
+        Returns the PDF value at x of the Beta distribution for the given MOS value, see getBetaPDF.
+        """ 
+        self._checkMOS(mos)
+        self._checkX(x)
+        a,b = _getBetaParams(mos, self.sos_parameter, self.low, self.high)
+        return _betaPDF((x-self.low)/(self.high-self.low), a, b)
+    
+    def getPoW(self, mos):
+        """ 
+        Returns the poor or worse ratio P(X <= PoW) for the given MOS value, see getPoW.
+        """ 
+        self._checkMOS(mos)
+        if mos==self.high:
+            return 0 
+        elif mos==self.low:
+            return 1
+        a,b = _getBetaParams(mos, self.sos_parameter, self.low, self.high)
+        return self._betainc(a, b, self._zPoW)
+    
+    def getGoB(self, mos):
+        """ 
+        Returns the good or better ratio P(X >= GoB) for the given MOS value, see getGoB.
+        """ 
+        self._checkMOS(mos)
+        if mos==self.high:
+            return 1 
+        elif mos==self.low:
+            return 0
+        a,b = _getBetaParams(mos, self.sos_parameter, self.low, self.high)
+        return 1-self._betainc(a, b, self._zGoB)
+    
+    def getDiscreteDistributionArrays(self, mos):
+        """ 
+        Returns the discrete rating distribution (xk, pk) for the given MOS value, see getDiscreteDistributionArrays.
+        """ 
+        self._checkMOS(mos)
+        pk = np.zeros(len(self.xk))
+        if mos==self.high:
+            pk[-1] = 1
+        elif mos==self.low:
+            pk[0] = 1
+        else:
+            a,b = _getBetaParams(mos, self.sos_parameter, self.low, self.high)
+            pk = np.diff(self._betainc(a, b, self._zk))
+        return (self.xk.copy(), pk)
+
+#%% vectorized computations for arrays of MOS values, e.g. obtained from QoS measurements via a mapping function
+def checkParameterArrays(mos, sos_parameter=0.25, low=1, high=5):
+    """ 
+    Checks the input parameters given as arrays if they are valid and potentially raises exceptions.
+    This is the vectorized counterpart of checkParameters.
+    
+    Parameters:
+        mos (numpy.ndarray): Array of MOS values on the [low;high] rating scale.
+        sos_parameter (float or numpy.ndarray): SOS parameter(s) in the range [0;1]. 
+            Either a single value or an array which can be broadcast against mos.
+        low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+                  
+    Returns:
+        (numpy.ndarray, numpy.ndarray): Tuple (mos, sos_parameter) of float arrays broadcast to a common shape.
+                              
+    Raises: 
+        ValueError: If any SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS is not in range [low;high].
+    """  
+    mos, sos_parameter = np.broadcast_arrays(np.asarray(mos, dtype=float), np.asarray(sos_parameter, dtype=float))
+    if low >= high:
+        raise ValueError('Upper bound of rating scale must be larger than lower bound: low<high.')    
+    if np.any(mos>high) or np.any(mos<low):
+        raise ValueError('MOS value must be in the range [low;high].')    
+    if np.any(sos_parameter>1) or np.any(sos_parameter<0):
+        raise ValueError('SOS parameter must be in range [0;1].')  
+    return mos, sos_parameter
+
+def getBetaParamsArrays(mos, sos_parameter=0.25, low=1, high=5):
+    """ 
+    Returns the parameters of the Beta distributions given arrays of MOS values and SOS parameters 
+    on [low;high] rating scale. This is the vectorized counterpart of getBetaParams.
+    
+    Parameters:
+        mos (numpy.ndarray): Array of MOS values on the [low;high] rating scale.
+        sos_parameter (float or numpy.ndarray): SOS parameter(s) in the range [0;1]. 
+            Either a single value or an array which can be broadcast against mos.
+        low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+                  
+    Returns:
+        (numpy.ndarray, numpy.ndarray): Tuple (a,b) of arrays with the parameters of the Beta distributions.
+        
+    Raises: 
+        ValueError: If any SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS is not in range [low;high].
+    """    
+    mos, sos_parameter = checkParameterArrays(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
+    
+    a = (1-sos_parameter)*(mos-low)/((high-low)*sos_parameter)
+    b = (1-sos_parameter)*(high-mos)/((high-low)*sos_parameter)
+    return a, b
+
+def _getBetaCDFMatrix(z, a, b, isLow, isHigh):
+    """ 
+    Evaluates the CDFs of N Beta distributions on [0;1] at K points z in one broadcast pass. 
+    Degenerate distributions for mos==low and mos==high are handled by the masks isLow and isHigh.
+    Returns an array of shape (N, K).
+    """
+    edge = isLow | isHigh
+    if _profiler is not None:
+        _profiler.addEdgeHits('_getBetaCDFMatrix', low=np.count_nonzero(isLow), high=np.count_nonzero(isHigh))
+    # replace the parameters of the degenerated distributions by dummy values to avoid nan
+    a = np.where(edge, 1.0, a)[:, None]
+    b = np.where(edge, 1.0, b)[:, None]
+    bcdf = _betaCDF(z[None, :], a, b)
+    bcdf = np.where(isLow[:, None], 1.0, bcdf)
+    bcdf = np.where(isHigh[:, None], (z>=1)[None, :]*1.0, bcdf)
+    return bcdf
+
+def getDiscreteDistributionArraysBatch(mos, sos_parameter=0.25, low=1, high=5, table=None):
+    """ 
+    Returns the discrete distributions approximating the rating distributions for an array of MOS values 
+    and SOS parameters on a discrete rating scale from low to high. This is the vectorized counterpart of 
+    getDiscreteDistributionArrays which evaluates all MOS values in a single pass.
+    
+    Parameters:
+        mos (numpy.ndarray): Array of N MOS values on the [low;high] rating scale.
+        sos_parameter (float or numpy.ndarray): SOS parameter(s) in the range [0;1]. 
+            Either a single value or an array of N values (one per MOS value).
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        table (BetaLookupTable): If provided, the probabilities are interpolated from the precomputed table.
+                  
+    Returns:
+        (xk, pk): Tuple of an Numpy array of discrete values xk and the corresponding probabilites pk 
+            as Numpy array of dimension N x len(xk). Row i of pk is the distribution for mos[i].
+        
+    Raises: 
+        ValueError: If any SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS is not in range [low;high].
+    """ 
+    if table is not None:
+        table.checkCompatible(sos_parameter=sos_parameter, low=low, high=high)
+        xk, pk, _, _ = table.getQoEArrays(mos)
+        return (xk, pk)
+    mos, sos_parameter = checkParameterArrays(mos=np.ravel(mos), sos_parameter=sos_parameter, low=low, high=high)
+    
+    xk = np.arange(low,high+1)    
+    a,b = getBetaParamsArrays(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
+    
+    zk = np.arange(low-0.5,high+1.5, step=1)
+    zk[0], zk[-1] = low, high
+    bcdf = _getBetaCDFMatrix((zk-low)/(high-low), a, b, isLow=(mos==low), isHigh=(mos==high))
+    bcdf[:, 0], bcdf[:, -1] = 0, 1
+    pk = np.diff(bcdf, axis=1)
+    return (xk, pk)
+
+def getQoEArraysBatch(mos, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, table=None):
+    """ 
+    Returns the discrete rating distributions as well as the poor or worse ratios and good or better ratios
+    for an array of MOS values. All quantities are derived from a single evaluation of the Beta CDFs.
+    
+    Parameters:
+        mos (numpy.ndarray): Array of N MOS values on the [low;high] rating scale.
+        sos_parameter (float or numpy.ndarray): SOS parameter(s) in the range [0;1]. 
+            Either a single value or an array of N values (one per MOS value).
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+                  
+    Returns:
+        (xk, pk, pow_vals, gob_vals): Tuple of an Numpy array of discrete values xk, the corresponding 
+            probabilites pk as Numpy array of dimension N x len(xk), and the Numpy arrays of the 
+            N poor or worse ratios and N good or better ratios.
+        
+    Raises: 
+        ValueError: If any SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS, PoW or GoB is not in range [low;high].
+    """ 
+    if table is not None:
+        table.checkCompatible(sos_parameter=sos_parameter, low=low, high=high, PoW=PoW, GoB=GoB)
+        return table.getQoEArrays(mos)
+    mos, sos_parameter = checkParameterArrays(mos=np.ravel(mos), sos_parameter=sos_parameter, low=low, high=high)
+    if PoW<low or PoW>high or GoB<low or GoB>high:
+        raise ValueError('PoW and GoB must be in the range [low;high].')    
+    
+    xk = np.arange(low,high+1)    
+    a,b = getBetaParamsArrays(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
+    isLow, isHigh = (mos==low), (mos==high)
+    
+    zk = np.arange(low-0.5,high+1.5, step=1)
+    zk[0], zk[-1] = low, high
+    z = np.append(zk, [PoW, GoB])
+    bcdf = _getBetaCDFMatrix((z-low)/(high-low), a, b, isLow=isLow, isHigh=isHigh)
+    
+    bcdf[:, 0], bcdf[:, len(zk)-1] = 0, 1
+    pk = np.diff(bcdf[:, :len(zk)], axis=1)
+    pow_vals = np.where(isHigh, 0.0, bcdf[:, -2])
+    gob_vals = np.where(isHigh, 1.0, 1-bcdf[:, -1])
+    return (xk, pk, pow_vals, gob_vals)
+
+#%% QoE in the system derived from QoS measurements and a MOS mapping function
+def getSystemQoE(qos, f, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, table=None):
+    """ 
+    Returns the QoE rating distribution and the QoE metrics in a system based on QoS measurements 
+    and a MOS mapping function f. The Beta approximations for all QoS measurements are evaluated 
+    in a single vectorized pass, see [QoEMAN2020].
+    
+    Parameters:
+        qos (numpy.ndarray): Array of QoS measurements in the system, e.g. page load times.
+        f (function): Vectorized MOS mapping function which maps an array of QoS values to MOS values 
+            on the [low;high] rating scale, e.g. f = lambda x: 4*np.exp(-0.25*x)+1
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+                  
+    Returns:
+        (xk, pk, mos, pow, gob): Tuple of an Numpy array of discrete values xk, the corresponding 
+            probabilites pk of the QoE ratings in the system, the expected system QoE E[Q], 
+            the poor or worse ratio and the good or better ratio in the system.
+        
+    Raises: 
+        ValueError: If SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS f(qos), PoW or GoB is not in range [low;high].
+    """ 
+    xk, pk, pow_vals, gob_vals = getQoEArraysBatch(f(np.asarray(qos)), sos_parameter=sos_parameter, 
+                                                   low=low, high=high, PoW=PoW, GoB=GoB, table=table)
+    pk = pk.mean(axis=0)
+    return (xk, pk, (xk*pk).sum(), pow_vals.mean(), gob_vals.mean())
+
+#%% tabulated Beta approximation for a fixed SOS parameter, answering queries by interpolation over a MOS grid
+class BetaLookupTable:
+    """ 
+    Precomputed discrete rating distributions, PoW and GoB ratios over a dense grid of MOS values for a 
+    fixed SOS parameter and rating scale. Queries are answered by linear interpolation between the grid 
+    points instead of evaluating the Beta CDF. The table can be passed via the parameter 'table' to 
+    getPoW, getGoB, getDiscreteDistributionArrays, getDiscreteDistributionArraysBatch, getQoEArraysBatch 
+    and getSystemQoE.
+    
+    The interpolation error of a grid cell of width h is bounded by h**2/8 times the maximum absolute 
+    second derivative within the cell, which is determined on a finer grid of MOS values (see 
+    getSystemQoEBinned). A safety factor accounts for the finite differences of the second derivative. 
+    If a tolerance is given, the grid is refined until this bound is below the tolerance.
+    
+    Parameters:
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        points (int): Number of equidistant MOS values in [low;high] for which the table is computed.
+        tol (float): Maximum absolute interpolation error. If None, the grid is not refined.
+        max_points (int): Maximum number of grid points used for the refinement.
+        
+    Attributes:
+        mos (numpy.ndarray): Grid of MOS values.
+        maxError (float): Upper bound of the maximum absolute error of the interpolated probabilities, 
+            PoW and GoB ratios compared to the exact computation.
+        
+    Raises: 
+        ValueError: If the parameters are invalid (see getQoEArraysBatch). If the tolerance is not met 
+        with max_points grid points.
+    """ 
+    errorSafetyFactor = 1.01
+    
+    def __init__(self, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, points=2001, tol=None, max_points=2**20):
+        self.sos_parameter, self.low, self.high, self.PoW, self.GoB = sos_parameter, low, high, PoW, GoB
+        while True:
+            self._compute(points)
+            if tol is None or self.maxError <= tol:
+                break
+            if 2*points-1 > max_points:
+                raise ValueError(f'Tolerance {tol} cannot be met with at most {max_points} grid points.')
+            points = 2*points-1
+    
+    def _compute(self, points):
+        self.mos = np.linspace(self.low, self.high, points)
+        self.xk, self._pk, self._pow, self._gob = getQoEArraysBatch(self.mos, sos_parameter=self.sos_parameter, 
+                                          low=self.low, high=self.high, PoW=self.PoW, GoB=self.GoB)
+        
+        # maximum curvature per cell from a finer grid with at least 4 subcells per cell and 4096 subcells in total
+        m = max(4, int(np.ceil(4096/(points-1))))
+        _, curvature = _getCurvatureGrid(self.sos_parameter, self.low, self.high, self.PoW, self.GoB, m*(points-1)+1)
+        h = self.mos[1]-self.mos[0]
+        bound = self.errorSafetyFactor*h**2/8*curvature.reshape(points-1, m).max(axis=1).max()
+        
+        # the error at the midpoints of the cells is a lower bound of the maximum error
+        mid = (self.mos[1:]+self.mos[:-1])/2
+        _, pk, pow_vals, gob_vals = getQoEArraysBatch(mid, sos_parameter=self.sos_parameter, 
+                                          low=self.low, high=self.high, PoW=self.PoW, GoB=self.GoB)
+        ipk, ipow, igob = self._interpolate(mid)
+        self.maxError = max(bound, np.abs(ipk-pk).max(), np.abs(ipow-pow_vals).max(), np.abs(igob-gob_vals).max())
+    
+    def _interpolate(self, mos):
+        t = (mos-self.low)/(self.high-self.low)*(len(self.mos)-1)
+        i = np.clip(np.floor(t).astype(int), 0, len(self.mos)-2)
+        w = t-i
+        pk = self._pk[i]*(1-w[:, None]) + self._pk[i+1]*w[:, None]
+        pow_vals = self._pow[i]*(1-w) + self._pow[i+1]*w
+        gob_vals = self._gob[i]*(1-w) + self._gob[i+1]*w
+        return pk, pow_vals, gob_vals
+    
+    def checkCompatible(self, sos_parameter=None, low=None, high=None, PoW=None, GoB=None):
+        """ 
+        Checks if the table was computed for the given parameters. Parameters which are None are not checked.
+        
+        Raises: 
+            ValueError: If any of the parameters differs from the parameters of the table.
+        """ 
+        given = dict(sos_parameter=sos_parameter, low=low, high=high, PoW=PoW, GoB=GoB)
+        for name, value in given.items():
+            if value is not None and np.any(value != getattr(self, name)):
+                raise ValueError(f'Lookup table was computed for {name}={getattr(self, name)}, but {name}={value} is requested.')
+    
+    def getQoEArrays(self, mos):
+        """ 
+        Returns the interpolated discrete rating distributions, PoW and GoB ratios for an array of MOS values.
+        
+        Parameters:
+            mos (numpy.ndarray): Array of N MOS values on the [low;high] rating scale.
+                  
+        Returns:
+            (xk, pk, pow_vals, gob_vals): see getQoEArraysBatch
+            
+        Raises: 
+            ValueError: If any MOS is not in range [low;high].
+        """ 
+        mos, _ = checkParameterArrays(mos=np.ravel(mos), sos_parameter=self.sos_parameter, low=self.low, high=self.high)
+        pk, pow_vals, gob_vals = self._interpolate(mos)
+        return (self.xk.copy(), pk, pow_vals, gob_vals)
+
+#%% streaming computation of the QoE in the system, e.g. for QoS measurements arriving continuously from probes
+class SystemQoEAccumulator:
+    """ 
+    Accumulates the QoE in the system from chunks of MOS values or QoS measurements without keeping 
+    the measurements in memory. The accumulator keeps running sums of the discrete rating probabilities, 
+    the PoW and GoB ratios and the MOS values as well as the number of samples. Accumulators from 
+    different workers can be merged and their state can be serialized, e.g. as JSON.
+    
+    Parameters:
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        f (function): Vectorized MOS mapping function which is applied to the added values. If None, 
+            the added values are MOS values.
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+    """ 
+    def __init__(self, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, f=None, table=None):
+        self.sos_parameter, self.low, self.high, self.PoW, self.GoB = sos_parameter, low, high, PoW, GoB
+        self.f, self.table = f, table
+        self.count = 0
+        self.pk_sum = np.zeros(high+1-low)
+        self.pow_sum, self.gob_sum, self.mos_sum = 0.0, 0.0, 0.0
+        
+    def add(self, values):
+        """ 
+        Adds a chunk of values to the accumulator.
+        
+        Parameters:
+            values (numpy.ndarray): Array of MOS values, or of QoS values if a mapping function f is used.
+            
+        Returns:
+            SystemQoEAccumulator: The accumulator itself.
+        """ 
+        values = np.ravel(values)
+        if values.size == 0:
+            return self
+        mos = values if self.f is None else self.f(values)
+        _, pk, pow_vals, gob_vals = getQoEArraysBatch(mos, sos_parameter=self.sos_parameter, low=self.low, 
+                                      high=self.high, PoW=self.PoW, GoB=self.GoB, table=self.table)
+        self.count += len(mos)
+        self.pk_sum += pk.sum(axis=0)
+        self.pow_sum += pow_vals.sum()
+        self.gob_sum += gob_vals.sum()
+        self.mos_sum += np.sum(mos)
+        return self
+    
+    def consume(self, iterable, chunksize=65536):
+        """ 
+        Adds all values from an iterable, e.g. a generator. The iterable may yield single values, 
+        which are collected into chunks of size chunksize, or arrays, which are added as chunks.
+        
+        Parameters:
+            iterable (iterable): Iterable of values or arrays of values.
+            chunksize (int): Number of single values which are added at once.
+            
+        Returns:
+            SystemQoEAccumulator: The accumulator itself.
+        """ 
+        buffer = []
+        for item in iterable:
+            if np.ndim(item) == 0:
+                buffer.append(item)
+                if len(buffer) >= chunksize:
+                    self.add(buffer)
+                    buffer = []
+            else:
+                self.add(item)
+        return self.add(buffer)
+    
+    def merge(self, other):
+        """ 
+        Merges the sums of another accumulator into this accumulator.
+        
+        Parameters:
+            other (SystemQoEAccumulator): Accumulator with the same SOS parameter, rating scale and thresholds.
+            
+        Returns:
+            SystemQoEAccumulator: The accumulator itself.
+            
+        Raises: 
+            ValueError: If the accumulators use different SOS parameters, rating scales or thresholds.
+        """ 
+        if self._params() != other._params():
+            raise ValueError('Only accumulators with the same SOS parameter, rating scale and thresholds can be merged.')
+        self.count += other.count
+        self.pk_sum += other.pk_sum
+        self.pow_sum += other.pow_sum
+        self.gob_sum += other.gob_sum
+        self.mos_sum += other.mos_sum
+        return self
+    
+    def _params(self):
+        return dict(sos_parameter=self.sos_parameter, low=self.low, high=self.high, PoW=self.PoW, GoB=self.GoB)
+    
+    def getState(self):
+        """ 
+        Returns the state of the accumulator as a dictionary of Python numbers and lists, 
+        which can be serialized e.g. with json.dumps. The mapping function and lookup table are not part of the state.
+        
+        Returns:
+            dict: State of the accumulator.
+        """ 
+        return dict(sos_parameter=float(self.sos_parameter), low=int(self.low), high=int(self.high), 
+                    PoW=float(self.PoW), GoB=float(self.GoB), count=int(self.count), pk_sum=self.pk_sum.tolist(), 
+                    pow_sum=float(self.pow_sum), gob_sum=float(self.gob_sum), mos_sum=float(self.mos_sum))
+    
+    @classmethod
+    def fromState(cls, state, f=None, table=None):
+        """ 
+        Creates an accumulator from a state returned by getState.
+        
+        Parameters:
+            state (dict): State of an accumulator.
+            f (function): Vectorized MOS mapping function which is applied to values added later on.
+            table (BetaLookupTable): If provided, the values added later on are interpolated from the table.
+            
+        Returns:
+            SystemQoEAccumulator: The restored accumulator.
+        """ 
+        acc = cls(sos_parameter=state['sos_parameter'], low=state['low'], high=state['high'], 
+                  PoW=state['PoW'], GoB=state['GoB'], f=f, table=table)
+        acc.count = state['count']
+        acc.pk_sum = np.array(state['pk_sum'], dtype=float)
+        acc.pow_sum, acc.gob_sum, acc.mos_sum = state['pow_sum'], state['gob_sum'], state['mos_sum']
+        return acc
+    
+    def getSystemQoE(self):
+        """ 
+        Returns the QoE rating distribution and the QoE metrics in the system for all values added so far.
+        
+        Returns:
+            (xk, pk, mos, pow, gob): see getSystemQoE
+            
+        Raises: 
+            ValueError: If no values have been added.
+        """ 
+        if self.count == 0:
+            raise ValueError('No values have been added to the accumulator.')
+        xk = np.arange(self.low, self.high+1)
+        pk = self.pk_sum/self.count
+        return (xk, pk, (xk*pk).sum(), self.pow_sum/self.count, self.gob_sum/self.count)
+    
+    def getMOS(self):
+        """ 
+        Returns the mean of all MOS values added so far, i.e. E[f(qos)] for QoS measurements.
+        
+        Returns:
+            float: Mean of the MOS values.
+        """ 
+        return self.mos_sum/self.count
+
+#%% parallel computation of the QoE in the system for QoS measurements partitioned into several shards
+class MOSMapping:
+    """ 
+    Declared MOS mapping function f which maps QoS values to MOS values. In contrast to a lambda function, 
+    a MOSMapping can be pickled and sent to worker processes, e.g. for getSystemQoEParallel.
+    
+    Parameters:
+        kind (str): Form of the mapping function with coefficients c:
+            'exponential': f(x) = c[0]*exp(-c[1]*x)+c[2], e.g. c=(4, 0.25, 1) for the page load time example; 
+            'logarithmic': f(x) = c[0]*log(c[1]*x)+c[2]; 
+            'linear': f(x) = c[0]*x+c[1]; 
+            'identity': f(x) = x, i.e. the values are MOS values.
+        coefficients (tuple): Coefficients c of the mapping function.
+        
+    Raises: 
+        ValueError: If the kind of mapping function is unknown or the number of coefficients does not match.
+    """ 
+    numberOfCoefficients = {'exponential': 3, 'logarithmic': 3, 'linear': 2, 'identity': 0}
+    
+    def __init__(self, kind='exponential', coefficients=(4, 0.25, 1)):
+        if kind not in self.numberOfCoefficients:
+            raise ValueError(f'Unknown mapping function {kind}. Must be one of {list(self.numberOfCoefficients)}.')
+        coefficients = tuple(float(c) for c in coefficients) if kind != 'identity' else ()
+        if len(coefficients) != self.numberOfCoefficients[kind]:
+            raise ValueError(f'Mapping function {kind} requires {self.numberOfCoefficients[kind]} coefficients.')
+        self.kind, self.coefficients = kind, coefficients
+        
+    def __call__(self, x):
+        c = self.coefficients
+        if self.kind == 'exponential':
+            return c[0]*np.exp(-c[1]*x)+c[2]
+        elif self.kind == 'logarithmic':
+            return c[0]*np.log(c[1]*x)+c[2]
+        elif self.kind == 'linear':
+            return c[0]*x+c[1]
+        return np.asarray(x, dtype=float)
+    
+    def __repr__(self):
+        return f'MOSMapping({self.kind!r}, {self.coefficients})'
+
+def _iterShard(shard, chunksize, column=None):
+    """ 
+    Yields the QoS values of a shard in chunks. Npy files are memory-mapped, csv files are read in chunks. 
+    For csv files, the values are taken from the given column, or from the first column of a file 
+    without header if column is None.
+    """ 
+    if isinstance(shard, str) or hasattr(shard, '__fspath__'):
+        if str(shard).endswith('.npy'):
+            qos = np.load(shard, mmap_mode='r')
+        else:
+            import pandas as pd
+            header, usecols = (None, [0]) if column is None else ('infer', [column])
+            for df in pd.read_csv(shard, chunksize=chunksize, header=header, usecols=usecols):
+                yield df.iloc[:, 0].to_numpy(dtype=float)
+            return
+    else:
+        qos = np.asarray(shard)
+    for start in range(0, len(qos), chunksize):
+        yield np.asarray(qos[start:start+chunksize])
+
+def _processShard(shard, f, sos_parameter, low, high, PoW, GoB, table, chunksize, column):
+    """ 
+    Accumulates the QoE of a single shard in chunks and returns the state of the accumulator.
+    """ 
+    acc = SystemQoEAccumulator(sos_parameter=sos_parameter, low=low, high=high, PoW=PoW, GoB=GoB, f=f, table=table)
+    return acc.consume(_iterShard(shard, chunksize, column)).getState()
+
+def accumulateShards(shards, f, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, table=None, 
+                     workers=None, chunksize=1000000, executor=None, column=None, progress=None):
+    """ 
+    Accumulates the QoE in a system based on QoS measurements which are partitioned into several shards. 
+    The shards are processed in parallel by a pool of processes, see getSystemQoEParallel.
+    
+    Parameters:
+        shards (list): List of shards, see getSystemQoEParallel.
+        f (function): Vectorized and picklable MOS mapping function, e.g. a MOSMapping.
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+        workers (int): Number of worker processes. If None, the number of processors is used. 
+            If 0, the shards are processed serially in the calling process.
+        chunksize (int): Number of QoS values of a shard which are processed at once.
+        executor (concurrent.futures.Executor): If provided, this executor is used instead of creating 
+            a process pool with the given number of workers.
+        column (str): Column of the QoS values in csv files with header. If None, csv files have no header 
+            and the QoS values are taken from the first column.
+        progress (function): If provided, progress(i, state) is called after the i-th shard has been 
+            merged with the state of its accumulator, see SystemQoEAccumulator.getState.
+                  
+    Returns:
+        SystemQoEAccumulator: Accumulator with the merged sums of all shards.
+    """ 
+    args = (f, sos_parameter, low, high, PoW, GoB, table, chunksize, column)
+    if executor is None and workers == 0:
+        states = (_processShard(shard, *args) for shard in shards)
+        return _mergeStates(states, sos_parameter, low, high, PoW, GoB, progress)
+    elif executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            states = pool.map(_processShard, shards, *[[arg]*len(shards) for arg in args])
+            return _mergeStates(states, sos_parameter, low, high, PoW, GoB, progress)
+    states = executor.map(_processShard, shards, *[[arg]*len(shards) for arg in args])
+    return _mergeStates(states, sos_parameter, low, high, PoW, GoB, progress)
+
+def _mergeStates(states, sos_parameter, low, high, PoW, GoB, progress):
+    acc = SystemQoEAccumulator(sos_parameter=sos_parameter, low=low, high=high, PoW=PoW, GoB=GoB)
+    for i, state in enumerate(states):
+        acc.merge(SystemQoEAccumulator.fromState(state))
+        if progress is not None:
+            progress(i, state)
+    return acc
+
+def getSystemQoEParallel(shards, f, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, table=None, 
+                         workers=None, chunksize=1000000, executor=None, column=None):
+    """ 
+    Returns the QoE rating distribution and the QoE metrics in a system based on QoS measurements which 
+    are partitioned into several shards, e.g. files per day and region. The shards are processed in parallel 
+    by a pool of processes. Each process computes the partial sums of a shard with SystemQoEAccumulator, 
+    which are then reduced into the system result in the order of the shards. Hence, the result does not 
+    depend on the number of processes and is identical to the serial computation with workers=0.
+    
+    Parameters:
+        shards (list): List of shards. A shard is either the path of a .npy file, which is memory-mapped 
+            in the worker process instead of sending the data to the worker, the path of a csv file 
+            with QoS values, which is read in chunks, or a Numpy array of QoS values.
+        f (function): Vectorized MOS mapping function, see getSystemQoE. The function must be picklable, 
+            e.g. a MOSMapping or a function defined at module level instead of a lambda function.
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+        workers (int): Number of worker processes. If None, the number of processors is used. 
+            If 0, the shards are processed serially in the calling process.
+        chunksize (int): Number of QoS values of a shard which are processed at once.
+        executor (concurrent.futures.Executor): If provided, this executor is used instead of creating 
+            a process pool with the given number of workers.
+        column (str): Column of the QoS values in csv files with header. If None, csv files have no header 
+            and the QoS values are taken from the first column.
+                  
+    Returns:
+        (xk, pk, mos, pow, gob): see getSystemQoE
+        
+    Raises: 
+        ValueError: If SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS f(qos), PoW or GoB is not in range [low;high]. 
+        If the shards do not contain any QoS values.
+    """ 
+    return accumulateShards(shards, f, sos_parameter=sos_parameter, low=low, high=high, PoW=PoW, GoB=GoB, 
+                            table=table, workers=workers, chunksize=chunksize, executor=executor, 
+                            column=column).getSystemQoE()
+
+#%% generation of synthetic user ratings based on the Beta approximation, e.g. for simulations
+def generateRatings(mos, sos_parameter=0.25, low=1, high=5, kind='discrete', size=None, chunksize=1000000, 
+                    seed=None, dtype=None):
+    """ 
+    Generates random user ratings for MOS values and SOS parameters based on the Beta approximation. 
+    A continuous rating is drawn from getBetaDistribution. The discrete rating is the continuous rating 
+    rounded to the closest integer on the rating scale, which follows getDiscreteDistributionArrays. 
+    The ratings are generated in chunks by a single Numpy random number generator and returned by an 
+    iterator to bound the memory.
+    
+    Parameters:
+        mos (float or numpy.ndarray): MOS value(s) on the [low;high] rating scale. One rating is generated 
+            for each MOS value.
+        sos_parameter (float or numpy.ndarray): SOS parameter(s) in the range [0;1]. 
+            Either a single value or an array which can be broadcast against mos.
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        kind (str): 'discrete' for discrete ratings, 'continuous' for continuous ratings, or 'both'.
+        size (int): Total number of ratings, if mos and sos_parameter are broadcast to this size, 
+            e.g. for a single MOS value. If None, the size of the broadcast mos and sos_parameter is used.
+        chunksize (int): Number of ratings per chunk.
+        seed (int or numpy.random.Generator): Seed or random number generator.
+        dtype (numpy.dtype): Data type of the discrete ratings, e.g. numpy.uint8. If None, the smallest 
+            integer type which can represent the rating scale is used.
+                  
+    Returns:
+        iterator: Iterator over the chunks of ratings. A chunk is a Numpy array of discrete or continuous 
+            ratings, or a tuple (discrete, continuous) for kind='both'.
+        
+    Raises: 
+        ValueError: If any SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS is not in range [low;high]. If kind is unknown.
+    """ 
+    if kind not in ('discrete', 'continuous', 'both'):
+        raise ValueError("Kind of ratings must be 'discrete', 'continuous' or 'both'.")
+    mos, sos_parameter = checkParameterArrays(mos=mos, sos_parameter=sos_parameter, low=low, high=high)
+    n = mos.size if size is None else size
+    mos = np.broadcast_to(np.ravel(mos) if size is None else mos, (n,))
+    sos_parameter = np.broadcast_to(np.ravel(sos_parameter) if size is None else sos_parameter, (n,))
+    if dtype is None:
+        dtype = np.result_type(np.min_scalar_type(low), np.min_scalar_type(high))
+    return _generateRatings(mos, sos_parameter, low, high, kind, chunksize, np.random.default_rng(seed), dtype)
+
+def _generateRatings(mos, sos_parameter, low, high, kind, chunksize, rng, dtype):
+    for start in range(0, len(mos), chunksize):
+        m, sos = mos[start:start+chunksize], sos_parameter[start:start+chunksize]
+        a, b = _getBetaParams(m, sos, low, high)
+        isLow, isHigh = (m==low), (m==high)
+        edge = isLow | isHigh
+        x = rng.beta(np.where(edge, 1.0, a), np.where(edge, 1.0, b))
+        x = np.where(isLow, 0.0, np.where(isHigh, 1.0, x))
+        x = low + x*(high-low)
+        if kind == 'continuous':
+            yield x
+            continue
+        discrete = np.clip(np.floor(x+0.5), low, high).astype(dtype)
+        yield discrete if kind == 'discrete' else (discrete, x)
+
+#%% continuous QoE distribution in the system as mixture of the Beta distributions of all QoS measurements
+class SystemQoEMixture:
+    """ 
+    Continuous QoE distribution in the system, which is the mixture of the Beta distributions 
+    getBetaDistribution for the MOS values of all QoS measurements, see [QoEMAN2020]. The parameters (a,b) 
+    of the components are stored in arrays, so that CDF and PDF are evaluated for many ratings x at once. 
+    MOS values equal to low or high are represented as point masses at low and high, respectively. 
+    
+    Parameters:
+        mos (numpy.ndarray): Array of MOS values on the [low;high] rating scale, e.g. f(qos).
+        sos_parameter (float or numpy.ndarray): SOS parameter(s) in the range [0;1]. 
+            Either a single value or an array which can be broadcast against mos.
+        low (float): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (float): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        weights (numpy.ndarray): Weights of the MOS values. If None, all MOS values have the same weight.
+        max_bytes (int): Approximate upper bound of the memory used when evaluating the components.
+        
+    Attributes:
+        a (numpy.ndarray): First parameters of the Beta components.
+        b (numpy.ndarray): Second parameters of the Beta components.
+        weights (numpy.ndarray): Normalized weights of the Beta components.
+        pLow (float): Probability mass at low.
+        pHigh (float): Probability mass at high.
+        
+    Raises: 
+        ValueError: If any SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS is not in range [low;high].
+    """ 
+    def __init__(self, mos, sos_parameter=0.25, low=1, high=5, weights=None, max_bytes=2**26):
+        mos, sos_parameter = checkParameterArrays(mos=np.ravel(mos), sos_parameter=sos_parameter, low=low, high=high)
+        weights = np.ones(len(mos)) if weights is None else np.ravel(weights).astype(float)
+        weights = weights/weights.sum()
+        isLow, isHigh = (mos==low), (mos==high)
+        inner = ~(isLow | isHigh)
+        a, b = _getBetaParams(mos[inner], sos_parameter[inner], low, high)
+        self._setComponents(a, b, weights[inner], weights[isLow].sum(), weights[isHigh].sum(), low, high, max_bytes)
+        
+    def _setComponents(self, a, b, weights, pLow, pHigh, low, high, max_bytes):
+        self.a, self.b, self.weights, self.pLow, self.pHigh = a, b, weights, pLow, pHigh
+        self.low, self.high, self.max_bytes = low, high, max_bytes
+        
+    def __len__(self):
+        return len(self.a)
+    
+    def _evaluate(self, x, func):
+        x = np.asarray(x, dtype=float)
+        z = np.ravel((x-self.low)/(self.high-self.low))
+        result = np.empty(len(z))
+        block = max(1, int(self.max_bytes // (8*max(1, len(self.a)))))
+        for start in range(0, len(z), block):
+            zb = z[None, start:start+block]
+            result[start:start+block] = self.weights @ func(zb)
+        return result.reshape(x.shape)
+    
+    def getCDF(self, x):
+        """ 
+        Returns the CDF P(Q <= x) of the system QoE Q for an array of ratings x.
+        
+        Parameters:
+            x (numpy.ndarray): Ratings on the [low;high] rating scale.
+            
+        Returns:
+            numpy.ndarray: CDF values with the shape of x.
+        """ 
+        from scipy.special import betainc
+        a, b = self.a[:, None], self.b[:, None]
+        cdf = self._evaluate(x, lambda z: betainc(a, b, np.clip(z, 0, 1)))
+        return cdf + self.pLow*(np.asarray(x) >= self.low) + self.pHigh*(np.asarray(x) >= self.high)
+    
+    def getPDF(self, x):
+        """ 
+        Returns the PDF of the continuous part of the system QoE Q for an array of ratings x. The PDF is 
+        the density on the [low;high] rating scale, i.e. the PDF of getBetaPDF, which refers to the 
+        normalized rating (x-low)/(high-low), divided by (high-low). The point masses pLow and pHigh are not included.
+        
+        Parameters:
+            x (numpy.ndarray): Ratings on the [low;high] rating scale.
+            
+        Returns:
+            numpy.ndarray: PDF values with the shape of x.
+        """ 
+        from scipy.special import betaln, xlogy, xlog1py
+        a, b = self.a[:, None], self.b[:, None]
+        lognorm = betaln(a, b)
+        pdf = lambda z: np.where((z >= 0) & (z <= 1), np.exp(xlogy(a-1, z) + xlog1py(b-1, -z) - lognorm), 0)
+        return self._evaluate(x, pdf)/(self.high-self.low)
+    
+    def getMean(self):
+        """ 
+        Returns the expected system QoE E[Q].
+        
+        Returns:
+            float: Mean of the mixture.
+        """ 
+        mean = self.weights @ (self.a/(self.a+self.b)) if len(self.a) else 0.0
+        return self.low + (self.high-self.low)*(mean + self.pHigh)
+    
+    def getQuantile(self, q, xtol=1e-10):
+        """ 
+        Returns the quantiles of the system QoE, i.e. the smallest ratings x with P(Q <= x) >= q. All 
+        quantiles are computed at once by bisection on [low;high].
+        
+        Parameters:
+            q (numpy.ndarray): Probabilities in the range [0;1].
+            xtol (float): Absolute tolerance of the quantiles.
+            
+        Returns:
+            numpy.ndarray: Quantiles with the shape of q.
+        """ 
+        q = np.asarray(q, dtype=float)
+        lo, hi = np.full(q.shape, float(self.low)), np.full(q.shape, float(self.high))
+        done = self.getCDF(lo) >= q
+        hi[done] = self.low
+        for _ in range(int(np.ceil(np.log2((self.high-self.low)/xtol)))):
+            mid = (lo+hi)/2
+            below = self.getCDF(mid) < q
+            lo, hi = np.where(below, mid, lo), np.where(below, hi, mid)
+        return hi
+    
+    def reduce(self, tol=0.01):
+        """ 
+        Returns a mixture with fewer components, in which all components with mean values in the same 
+        interval of width tol on the rating scale are merged into a single Beta component with the same 
+        mean and variance (moment matching).
+        
+        Parameters:
+            tol (float): Width of the intervals on the [low;high] rating scale, e.g. 0.01.
+            
+        Returns:
+            SystemQoEMixture: Reduced mixture with at most (high-low)/tol+1 Beta components.
+        """ 
+        a, b, w = self.a, self.b, self.weights
+        mean = a/(a+b)
+        second = mean*(a+1)/(a+b+1)
+        groups, inv = np.unique(np.floor(mean*(self.high-self.low)/tol), return_inverse=True)
+        wsum = np.bincount(inv, weights=w, minlength=len(groups))
+        m1 = np.bincount(inv, weights=w*mean, minlength=len(groups))/wsum
+        m2 = np.bincount(inv, weights=w*second, minlength=len(groups))/wsum
+        var = np.maximum(m2 - m1**2, np.finfo(float).tiny)
+        nu = m1*(1-m1)/var - 1
+        
+        reduced = SystemQoEMixture.__new__(SystemQoEMixture)
+        reduced._setComponents(m1*nu, (1-m1)*nu, wsum, self.pLow, self.pHigh, self.low, self.high, self.max_bytes)
+        return reduced
+
+#%% QoE in the system for binned QoS measurements or MOS values, e.g. for millions of repeated QoS values
+def _getCurvatureGrid(sos_parameter, low, high, PoW, GoB, points):
+    """ 
+    Returns a grid of MOS values and for each grid cell the maximum absolute second derivative of the 
+    discrete rating probabilities, PoW and GoB ratios with respect to the MOS value.
+    """ 
+    grid = np.linspace(low, high, points)
+    _, pk, pow_vals, gob_vals = getQoEArraysBatch(grid, sos_parameter=sos_parameter, low=low, high=high, PoW=PoW, GoB=GoB)
+    values = np.column_stack([pk, pow_vals, gob_vals])
+    h = grid[1]-grid[0]
+    curvature = np.abs(values[2:] - 2*values[1:-1] + values[:-2]).max(axis=1)/h**2
+    curvature = np.concatenate([curvature[:1], curvature, curvature[-1:]])
+    return grid, np.maximum(curvature[:-1], curvature[1:])
+
+def _getRangeMax(values, first, last):
+    """ 
+    Returns max(values[first[i]:last[i]+1]) for all i using a sparse table.
+    """ 
+    table = [values]
+    while 2**len(table) <= len(values):
+        prev, half = table[-1], 2**(len(table)-1)
+        table.append(np.maximum(prev[:-half], prev[half:]))
+    k = np.floor(np.log2(last-first+1)).astype(int)
+    result = np.empty(len(first))
+    for level in np.unique(k):
+        sel = k == level
+        result[sel] = np.maximum(table[level][first[sel]], table[level][last[sel]-2**level+1])
+    return result
+
+def _getAdaptiveBinEdges(grid, curvature, tol):
+    """ 
+    Returns bin edges on the MOS scale such that half the maximum curvature within a bin times the 
+    squared bin width does not exceed tol. Grid cells with a larger curvature are split into equally wide bins.
+    """ 
+    edges = [grid[0]]
+    start, maxCurvature = grid[0], 0.0
+    for j in range(len(curvature)):
+        if max(maxCurvature, curvature[j])*(grid[j+1]-start)**2/2 <= tol:
+            maxCurvature = max(maxCurvature, curvature[j])
+            continue
+        if grid[j] > start:
+            edges.append(grid[j])
+        start, maxCurvature = grid[j], curvature[j]
+        pieces = int(np.ceil((grid[j+1]-grid[j])*np.sqrt(curvature[j]/(2*tol))))
+        if pieces > 1:
+            edges.extend(np.linspace(grid[j], grid[j+1], pieces+1)[1:-1])
+            start = edges[-1]
+    edges.append(grid[-1])
+    return np.array(edges)
+
+def getSystemQoEBinned(qos, f=None, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, width=None, tol=None, 
+                       on='mos', table=None, points=4097):
+    """ 
+    Returns the QoE rating distribution and the QoE metrics in a system based on QoS measurements, which are 
+    aggregated into bins before the Beta approximation is evaluated. Each bin is represented by the mean MOS 
+    value of its samples and weighted by the number of samples, so that the costs scale with the number of bins 
+    instead of the number of samples. The bins have either a fixed width on the QoS or MOS scale, or are 
+    chosen adaptively on the MOS scale such that the error is below a tolerance. 
+    
+    The returned error bound follows from a second order Taylor expansion around the mean MOS value of each 
+    bin: half the maximum curvature of the rating probabilities, PoW and GoB ratios within the bin times the 
+    variance of the MOS values in the bin, averaged over all samples. The curvature is determined on a grid 
+    of MOS values.
+    
+    Parameters:
+        qos (numpy.ndarray): Array of QoS measurements in the system, e.g. page load times.
+        f (function): Vectorized MOS mapping function, see getSystemQoE. If None, qos are MOS values.
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        width (float): Width of the bins on the QoS scale (on='qos') or MOS scale (on='mos').
+        tol (float): Maximum absolute error of the system rating probabilities, PoW and GoB ratio 
+            for adaptive bins on the MOS scale. Either width or tol must be given.
+        on (str): 'qos' or 'mos' for bins of fixed width on the QoS or MOS scale.
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+        points (int): Number of grid points for determining the curvature.
+                  
+    Returns:
+        (xk, pk, mos, pow, gob, maxError): see getSystemQoE; maxError is an upper bound of the absolute 
+            error of the system rating probabilities pk, PoW and GoB ratio due to the binning.
+        
+    Raises: 
+        ValueError: If SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS f(qos), PoW or GoB is not in range [low;high]. 
+        If neither width nor tol is given, or on is unknown.
+    """ 
+    qos = np.ravel(qos)
+    mos, _ = checkParameterArrays(mos=qos if f is None else f(qos), sos_parameter=sos_parameter, low=low, high=high)
+    grid, curvature = _getCurvatureGrid(sos_parameter, low, high, PoW, GoB, points)
+    
+    if width is not None:
+        if on not in ('qos', 'mos'):
+            raise ValueError("Bins must be on 'qos' or 'mos' scale.")
+        values = mos if on == 'mos' else qos
+        index = np.floor((values-values.min())/width)
+    elif tol is not None:
+        index = np.searchsorted(_getAdaptiveBinEdges(grid, curvature, tol), mos, side='right')
+    else:
+        raise ValueError('Either the width of the bins or the tolerance must be given.')
+    
+    _, inv = np.unique(index, return_inverse=True)
+    counts = np.bincount(inv)
+    rep = np.clip(np.bincount(inv, weights=mos)/counts, low, high)
+    
+    mosMin, mosMax = np.full(len(counts), np.inf), np.full(len(counts), -np.inf)
+    np.minimum.at(mosMin, inv, mos)
+    np.maximum.at(mosMax, inv, mos)
+    cell = lambda m: np.clip(np.searchsorted(grid, m, side='right')-1, 0, len(curvature)-1)
+    binCurvature = _getRangeMax(curvature, cell(mosMin), cell(mosMax))
+    maxError = np.sum(binCurvature/2*np.bincount(inv, weights=(mos-rep[inv])**2))/len(mos)
+    
+    xk, pk, pow_vals, gob_vals = getQoEArraysBatch(rep, sos_parameter=sos_parameter, low=low, high=high, 
+                                                   PoW=PoW, GoB=GoB, table=table)
+    w = counts/len(mos)
+    pk = w @ pk
+    return (xk, pk, (xk*pk).sum(), w @ pow_vals, w @ gob_vals, maxError)
+
+#%% QoE in the system per segment, e.g. per cell, region, device class or hour
+def getSystemQoEGrouped(df, f, by, qos='qos', sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, table=None):
+    """ 
+    Returns the QoE rating distribution and the QoE metrics in a system for each group of QoS measurements 
+    in a Pandas dataframe. The Beta approximations are evaluated once for all rows, and the results are 
+    summed per group with group codes and numpy.bincount.
+    
+    Parameters:
+        df (pandas.DataFrame): QoS measurements with a column of QoS values and one or more key columns.
+        f (function): Vectorized MOS mapping function, see getSystemQoE.
+        by (str or list): Name(s) of the key column(s) defining the groups.
+        qos (str): Name of the column with the QoS values.
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+                  
+    Returns:
+        pandas.DataFrame: One row per group with the key column(s), the number of QoS measurements 'count', 
+            the probabilities 'p1', ..., 'p5' of the QoE ratings (for a 5-point scale), the expected system 
+            QoE 'mos', the poor or worse ratio 'pow' and the good or better ratio 'gob'.
+        
+    Raises: 
+        ValueError: If SOS parameter is not in range [0;1]. If upper bound 'high' of rating scale is 
+        smaller than the lower bound 'low'. If any MOS f(qos), PoW or GoB is not in range [low;high]. 
+        If a key column has the same name as a result column.
+    """ 
+    keys = [by] if isinstance(by, str) else list(by)
+    clashes = [key for key in keys if isinstance(key, str) and key in ['count'] + [f'p{x}' for x in range(low, high+1)] + ['mos', 'pow', 'gob']]
+    if clashes:
+        raise ValueError(f'Key column(s) {clashes} clash with the result columns count, p{low}, ..., p{high}, mos, pow and gob. '
+                         'Rename the key column(s) before grouping.')
+    grouped = df.groupby(by, sort=True, dropna=False, observed=True)
+    codes = grouped.ngroup().to_numpy()
+    result = grouped.size().rename('count').reset_index()
+    counts = result['count'].to_numpy()
+    
+    xk, pk, pow_vals, gob_vals = getQoEArraysBatch(f(df[qos].to_numpy()), sos_parameter=sos_parameter, 
+                                                   low=low, high=high, PoW=PoW, GoB=GoB, table=table)
+    pkGroups = np.column_stack([np.bincount(codes, weights=pk[:, k], minlength=len(counts)) 
+                                for k in range(len(xk))])/counts[:, None]
+    for k, x in enumerate(xk):
+        result[f'p{x}'] = pkGroups[:, k]
+    result['mos'] = pkGroups @ xk
+    result['pow'] = np.bincount(codes, weights=pow_vals, minlength=len(counts))/counts
+    result['gob'] = np.bincount(codes, weights=gob_vals, minlength=len(counts))/counts
+    return result
+
+#%% QoE in the system over sliding or tumbling time windows of a stream of QoS measurements
+class SystemQoEWindow:
+    """ 
+    Computes the QoE in the system over time windows of timestamped QoS measurements. The contributions of 
+    the measurements (rating probabilities, PoW and GoB ratios, MOS values) are summed per time bucket in a 
+    ring buffer. The aggregate of the sliding window which ends at the latest timestamp (watermark) is updated 
+    incrementally when measurements are added and when buckets leave the window. Additionally, hopping windows 
+    of the given length which start every step seconds are emitted as soon as they are complete; for 
+    step=window these are tumbling windows. 
+    
+    Measurements may arrive out of order. A measurement is accepted if its bucket is not older than the bucket 
+    of the watermark minus the lateness; otherwise it is dropped and counted in 'dropped'. A hopping window is 
+    complete when the watermark exceeds its end by the lateness.
+    
+    Parameters:
+        window (float): Length of the windows, e.g. 60 for 1 minute with timestamps in seconds.
+        bucket (float): Length of the time buckets. window, step and lateness must be multiples of bucket.
+        step (float): Step between the starts of hopping windows. If None, no hopping windows are emitted.
+        lateness (float): Maximum delay of measurements behind the watermark.
+        f (function): Vectorized MOS mapping function. If None, the added values are MOS values.
+        sos_parameter (float): SOS parameter is scale independent and must be in the range [0;1].
+        low (int): Lower bound of the rating scale used for the ratings, e.g. low=1 for a 5-point scale.
+        high (int): Upper bound of the rating scale used for the ratings, e.g. high=5 for a 5-point scale.
+        PoW (float): Continuous value on the rating scale indicating poor or worse. E.g. PoW=2.5 for scale [1;5].
+        GoB (float): Continuous value on the rating scale indicating good or better. E.g. GoB=3.5 for scale [1;5].
+        table (BetaLookupTable): If provided, the values are interpolated from the precomputed table.
+        
+    Attributes:
+        count (int): Number of measurements in the sliding window.
+        dropped (int): Number of measurements dropped due to lateness.
+        
+    Raises: 
+        ValueError: If window, step or lateness is not a multiple of bucket.
+    """ 
+    def __init__(self, window, bucket=1, step=None, lateness=0, f=None, sos_parameter=0.25, low=1, high=5, 
+                 PoW=2.5, GoB=3.5, table=None):
+        self._nw, self._nl = self._buckets(window, bucket), self._buckets(lateness, bucket)
+        self._ns = None if step is None else self._buckets(step, bucket)
+        self.window, self.bucket, self.step, self.lateness, self.f = window, bucket, step, lateness, f
+        self.sos_parameter, self.low, self.high, self.PoW, self.GoB, self.table = sos_parameter, low, high, PoW, GoB, table
+        self.xk = np.arange(low, high+1)
+        
+        size = self._nw + self._nl
+        self._ids = np.full(size, np.iinfo(np.int64).min)
+        self._counts = np.zeros(size, dtype=np.int64)
+        self._sums = np.zeros((size, len(self.xk)+3))
+        self._totalSums = np.zeros(len(self.xk)+3)
+        self.count, self.dropped = 0, 0
+        self._wm, self._nextWindow = None, None
+        self._datetime = False
+        
+    @staticmethod
+    def _buckets(duration, bucket):
+        n = int(round(duration/bucket))
+        if abs(n*bucket - duration) > 1e-9*bucket or n < 0:
+            raise ValueError('Window, step and lateness must be non-negative multiples of the bucket length.')
+        return max(n, 1) if duration else 0
+    
+    def add(self, timestamps, values):
+        """ 
+        Adds a batch of measurements, which are processed in the order of their time buckets.
+        
+        Parameters:
+            timestamps (numpy.ndarray): Timestamps in seconds or as numpy.datetime64.
+            values (numpy.ndarray): QoS values, or MOS values if no mapping function is used.
+            
+        Returns:
+            list: Hopping windows completed by this batch as tuples (start, end, (xk, pk, mos, pow, gob)), 
+                see getSystemQoE. Windows without measurements are not returned. The bounds start and end are 
+                numpy.datetime64 values in nanoseconds for timestamps given as numpy.datetime64, otherwise 
+                numbers in the unit of the timestamps.
+        """ 
+        timestamps, values = np.ravel(timestamps), np.ravel(values)
+        self._datetime = np.issubdtype(timestamps.dtype, np.datetime64)
+        if self._datetime:
+            timestamps = timestamps.astype('datetime64[ns]').astype(np.int64)/1e9
+        ids = np.floor(timestamps/self.bucket).astype(np.int64)
+        
+        if self._wm is not None:
+            late = ids < self._wm - self._nl
+            self.dropped += int(late.sum())
+            ids, values = ids[~late], values[~late]
+        if len(ids) == 0:
+            return []
+        
+        mos = values if self.f is None else self.f(values)
+        _, pk, pow_vals, gob_vals = getQoEArraysBatch(mos, sos_parameter=self.sos_parameter, low=self.low, 
+                                      high=self.high, PoW=self.PoW, GoB=self.GoB, table=self.table)
+        contributions = np.column_stack([pk, pow_vals, gob_vals, mos])
+        buckets, inv = np.unique(ids, return_inverse=True)
+        counts = np.bincount(inv)
+        sums = np.column_stack([np.bincount(inv, weights=c, minlength=len(buckets)) for c in contributions.T])
+        
+        closed = []
+        for i, bucket in enumerate(buckets):
+            if self._wm is None or bucket > self._wm:
+                closed.extend(self._advance(bucket))
+            self._insert(bucket, counts[i], sums[i])
+        return closed
+    
+    def _insert(self, bucket, count, sums):
+        slot = bucket % len(self._ids)
+        if self._ids[slot] != bucket:
+            self._ids[slot], self._counts[slot], self._sums[slot] = bucket, 0, 0
+        self._counts[slot] += count
+        self._sums[slot] += sums
+        if bucket > self._wm - self._nw:
+            self.count += count
+            self._totalSums += sums
+    
+    def _advance(self, wm):
+        if self._wm is None:
+            self._wm = wm
+            if self._ns is not None:
+                # first window which can still receive measurements within the lateness
+                self._nextWindow = (wm - self._nw - self._nl)//self._ns + 1
+            return []
+        closed = self._closeWindows(wm) if self._ns is not None else []
+        
+        leaving = (self._ids > self._wm - self._nw) & (self._ids <= wm - self._nw)
+        self.count -= int(self._counts[leaving].sum())
+        self._totalSums -= self._sums[leaving].sum(axis=0)
+        
+        reused = np.arange(max(self._wm+1, wm-len(self._ids)+1), wm+1) % len(self._ids)
+        self._ids[reused], self._counts[reused], self._sums[reused] = np.iinfo(np.int64).min, 0, 0
+        self._wm = wm
+        return closed
+    
+    def _closeWindows(self, wm):
+        closed = []
+        while True:
+            first = self._nextWindow*self._ns
+            last = first + self._nw
+            if last > wm - self._nl:
+                break
+            if first > self._wm:
+                # all remaining complete windows start after the latest measurement and are empty
+                self._nextWindow = (wm - self._nl - self._nw)//self._ns + 1
+                break
+            inside = (self._ids >= first) & (self._ids < last)
+            count = int(self._counts[inside].sum())
+            if count > 0:
+                closed.append((self._getTime(first), self._getTime(last), self._getResult(count, self._sums[inside].sum(axis=0))))
+            self._nextWindow += 1
+        return closed
+    
+    def _getTime(self, bucket):
+        if self._datetime:
+            return np.datetime64(int(round(bucket*self.bucket*1e9)), 'ns')
+        return bucket*self.bucket
+    
+    def _getResult(self, count, sums):
+        pk = sums[:len(self.xk)]/count
+        return (self.xk.copy(), pk, (self.xk*pk).sum(), sums[-3]/count, sums[-2]/count)
+    
+    def getSystemQoE(self):
+        """ 
+        Returns the QoE rating distribution and the QoE metrics of the sliding window ending at the watermark.
+        
+        Returns:
+            (xk, pk, mos, pow, gob): see getSystemQoE
+            
+        Raises: 
+            ValueError: If the sliding window does not contain any measurements.
+        """ 
+        if self.count == 0:
+            raise ValueError('The sliding window does not contain any measurements.')
+        return self._getResult(self.count, self._totalSums)
+    
+    def getMOS(self):
+        """ 
+        Returns the mean of the MOS values in the sliding window, i.e. E[f(qos)] for QoS measurements.
+        
+        Returns:
+            float: Mean of the MOS values.
+        """ 
+        return self._totalSums[-1]/self.count
+
+#%% parameter sweeps over grids of MOS values, SOS parameters, rating scales and thresholds
+def sweepParameters(mos, sos_parameter=0.25, low=1, high=5, PoW=2.5, GoB=3.5, x=None, max_bytes=2**27):
+    """ 
+    Evaluates the discrete rating probabilities, the CDF, the PoW and GoB ratios of the Beta approximation 
+    for all combinations of rating scales, SOS parameters, MOS values and thresholds as one N-dimensional 
+    broadcast. The grid is processed in chunks along the MOS axis to bound the memory of intermediate results.
+    
+    Entries of MOS values, thresholds or ratings which are outside of a rating scale are nan. The discrete 
+    rating probabilities are given for all integer ratings from min(low) to max(high).
+    
+    Parameters:
+        mos (numpy.ndarray): Axis of MOS values.
+        sos_parameter (float or numpy.ndarray): Axis of SOS parameters in the range ]0;1].
+        low (int or numpy.ndarray): Lower bounds of the rating scales.
+        high (int or numpy.ndarray): Upper bounds of the rating scales, with the same length as low.
+        PoW (float or numpy.ndarray): Axis of thresholds for the poor or worse ratio.
+        GoB (float or numpy.ndarray): Axis of thresholds for the good or better ratio.
+        x (numpy.ndarray): Axis of ratings at which the CDF P(X <= x) is evaluated. If None, the CDF is not computed.
+        max_bytes (int): Approximate upper bound of the memory used for intermediate results of one chunk.
+                  
+    Returns:
+        dict: Labeled arrays 'pk', 'cdf', 'pow' and 'gob', the dimension names of each array in 'dims' 
+            and the axis values in 'coords'. The arrays have the dimensions ('scale', 'sos_parameter', 'mos') 
+            followed by 'rating', 'x', 'PoW' or 'GoB', respectively.
+        
+    Raises: 
+        ValueError: If any SOS parameter is not in range ]0;1]. If any upper bound 'high' of a rating scale is 
+        not larger than the lower bound 'low', or low and high have different lengths.
+    """ 
+    mos, sos = np.atleast_1d(mos).astype(float), np.atleast_1d(sos_parameter).astype(float)
+    low, high = np.atleast_1d(low), np.atleast_1d(high)
+    PoW, GoB = np.atleast_1d(PoW).astype(float), np.atleast_1d(GoB).astype(float)
+    if low.shape != high.shape or np.any(low >= high):
+        raise ValueError('Upper bound of rating scale must be larger than lower bound: low<high.')    
+    if np.any(sos>1) or np.any(sos<=0):
+        raise ValueError('SOS parameter must be in range ]0;1].')  
+    
+    ratings = np.arange(low.min(), high.max()+1)
+    coords = {'scale': np.column_stack([low, high]), 'sos_parameter': sos, 'mos': mos, 'rating': ratings, 'PoW': PoW, 'GoB': GoB}
+    dims = {'pk': ('scale', 'sos_parameter', 'mos', 'rating'), 'pow': ('scale', 'sos_parameter', 'mos', 'PoW'), 
+            'gob': ('scale', 'sos_parameter', 'mos', 'GoB')}
+    points = {'pk': 2*len(ratings), 'pow': len(PoW), 'gob': len(GoB)}
+    if x is not None:
+        coords['x'] = np.atleast_1d(x).astype(float)
+        dims['cdf'] = ('scale', 'sos_parameter', 'mos', 'x')
+        points['cdf'] = len(coords['x'])
+    
+    # normalized points per scale and quantity: scale x 1 x 1 x points
+    lo, hi, width = low[:, None], high[:, None], (high-low)[:, None]
+    lower, upper = np.maximum(ratings-0.5, lo), np.minimum(ratings+0.5, hi)
+    zk = {'pk': np.concatenate([(lower-lo)/width, (upper-lo)/width], axis=1), 
+          'pow': (PoW-lo)/width, 'gob': (GoB-lo)/width}
+    if x is not None:
+        zk['cdf'] = (coords['x']-lo)/width
+    inScale = {k: (z >= 0) & (z <= 1) for k, z in zk.items()}
+    inScale['pk'] = np.tile((ratings >= lo) & (ratings <= hi), 2)
+    
+    S, A, M = len(low), len(sos), len(mos)
+    result = {k: np.empty((S, A, M, n//2 if k == 'pk' else n)) for k, n in points.items()}
+    block = max(1, int(max_bytes // (8*3*S*A*max(points.values()))))
+    nu = ((1-sos)/sos)[None, :, None, None]
+    
+    from scipy.special import betainc
+    for start in range(0, M, block):
+        zm = ((mos[start:start+block]-lo)/width)[:, None, :, None]
+        valid = (zm >= 0) & (zm <= 1)
+        isLow, isHigh = (zm == 0), (zm == 1)
+        edge = isLow | isHigh | ~valid
+        a, b = np.where(edge, 1.0, nu*zm), np.where(edge, 1.0, nu*(1-zm))
+        for k, z in zk.items():
+            z4 = np.clip(z, 0, 1)[:, None, None, :]
+            cdf = betainc(a, b, z4)
+            cdf = np.where(isLow, 1.0, np.where(isHigh, (z4 >= 1)*1.0, cdf))
+            if k == 'pk':
+                n = len(ratings)
+                cdf[..., :n] = np.where(z4[..., :n] == 0, 0.0, cdf[..., :n])
+                cdf[..., n:] = np.where(z4[..., n:] == 1, 1.0, cdf[..., n:])
+                values = cdf[..., n:] - cdf[..., :n]
+                mask = inScale[k][:, None, None, :n]
+            elif k == 'pow':
+                values = np.where(isHigh, 0.0, np.where(isLow, 1.0, cdf))
+                mask = inScale[k][:, None, None, :]
+            elif k == 'gob':
+                values = np.where(isHigh, 1.0, np.where(isLow, 0.0, 1-cdf))
+                mask = inScale[k][:, None, None, :]
+            else:
+                values, mask = cdf, inScale[k][:, None, None, :]
+            result[k][:, :, start:start+block] = np.where(mask & valid, values, np.nan)
+    
+    result['dims'], result['coords'] = dims, coords
+    return result
+
+#%% opt-in instrumentation of the computations, e.g. to find out where the time is spent in a slow system QoE computation
+# functions which are instrumented while a Profiler is enabled, grouped by the stage of the computation
+_profiledFunctions = (
+    # validation of the parameters
+    'checkParameters', 'checkParameterArrays', 
+    # computation of the Beta parameters
+    'getBetaParams', '_getBetaParams', 'getBetaParamsArrays', 'getBetaParamsForMOSSOS', 
+    # construction of the scipy distribution objects
+    'getBetaDistribution', '_getBetaDistribution', 'getDiscreteDistribution', '_getDiscreteDistribution', 
+    # evaluation of the Beta CDF and PDF
+    '_betaCDF', '_betaPDF', '_getBetaCDFMatrix', 'getBetaCDF', 'getBetaPDF', 'getPoW', 'getGoB', 
+    'getDiscreteDistributionArrays', '_getDiscreteDistributionArrays', 
+    # vectorized and system level computations
+    'getDiscreteDistributionArraysBatch', 'getQoEArraysBatch', 'getSystemQoE', 
+    # derivation of the SOS parameter
+    'calcSOSParameter', 'calcSOSParameterForMOSSOS')
+
+_profiler = None
+
+class Profiler:
+    """ 
+    Opt-in instrumentation of the module which counts the calls and measures the cumulative time of the 
+    functions involved in the computations: validation of the parameters, computation of the Beta parameters, 
+    construction of the scipy distribution objects and evaluation of the Beta CDF. In addition, the number 
+    of short-circuits for the degenerate distributions mos==low and mos==high are counted and the cache 
+    statistics are reported, see getCacheInfo. 
+    
+    While the profiler is enabled, the functions of the module are replaced by instrumented wrappers. 
+    When it is disabled, the original functions are restored, so there is no overhead apart from a check 
+    in the mos==low and mos==high branches. Only calls via the module are instrumented, not functions 
+    imported with 'from approxQoEdist import ...' before enabling, nor computations in worker processes.
+    
+    The profiler can be used as context manager, e.g.
+        with Profiler() as prof:
+            getSystemQoE(qos, f)
+        prof.printStats()
+    The statistics are compatible with the pstats module, e.g. pstats.Stats(prof), or prof.dumpStats(filename) 
+    for tools reading cProfile output.
+    """ 
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """ 
+        Discards all statistics collected so far.
+        """ 
+        self._calls, self._tottime, self._cumtime = {}, {}, {}
+        self._callers, self._edges = {}, {}
+        self._stack = []
+        
+    def enable(self):
+        """ 
+        Enables the instrumentation of the module. 
+        
+        Raises:
+            RuntimeError: If another profiler is already enabled.
+        """ 
+        global _profiler
+        if _profiler is self:
+            return self
+        if _profiler is not None:
+            raise RuntimeError('Another profiler is already enabled.')
+        module = globals()
+        self._originals = {name: module[name] for name in _profiledFunctions}
+        for name, func in self._originals.items():
+            module[name] = self._wrap(name, func)
+        _profiler = self
+        return self
+    
+    def disable(self):
+        """ 
+        Disables the instrumentation and restores the original functions of the module. 
+        The collected statistics are kept.
+        """ 
+        global _profiler
+        if _profiler is self:
+            globals().update(self._originals)
+            _profiler = None
+        return self
+    
+    def __enter__(self):
+        return self.enable()
+    
+    def __exit__(self, *exc):
+        self.disable()
+        return False
+        
+    def _wrap(self, name, func):
+        from functools import wraps
+        from time import perf_counter
+        calls, tottime, cumtime, callers, stack = self._calls, self._tottime, self._cumtime, self._callers, self._stack
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profiler is not self: # e.g. a wrapper imported from the module while the profiler was enabled
+                return func(*args, **kwargs)
+            caller = stack[-1][0] if stack else None
+            frame = [name, 0.0]
+            stack.append(frame)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                calls[name] = calls.get(name, 0) + 1
+                tottime[name] = tottime.get(name, 0.0) + elapsed - frame[1]
+                cumtime[name] = cumtime.get(name, 0.0) + elapsed
+                c = callers.setdefault(name, {}).setdefault(caller, [0, 0.0, 0.0])
+                c[0] += 1
+                c[1] += elapsed - frame[1]
+                c[2] += elapsed
+        return wrapper
+    
+    def addEdgeHits(self, name, low=0, high=0):
+        """ 
+        Counts the short-circuits for mos==low and mos==high in the function with the given name.
+        """ 
+        hits = self._edges.setdefault(name, [0, 0])
+        hits[0] += int(low)
+        hits[1] += int(high)
+        
+    def getStats(self):
+        """ 
+        Returns the collected statistics.
+        
+        Returns:
+            dict: Key 'functions' provides for each called function a dictionary with the number of 'calls', 
+                the cumulative time 'cumtime' including and the time 'tottime' excluding the instrumented 
+                functions called by it, and the number of calls per instrumented 'callers' (None for calls 
+                from outside). Key 'edges' provides for each function the number of short-circuits 
+                'mos==low' and 'mos==high'. Key 'cache' provides the cache statistics, see getCacheInfo.
+        """ 
+        functions = {name: {'calls': self._calls[name], 'tottime': self._tottime[name], 'cumtime': self._cumtime[name], 
+                            'callers': {caller: c[0] for caller, c in self._callers[name].items()}} 
+                     for name in self._calls}
+        edges = {name: {'mos==low': hits[0], 'mos==high': hits[1]} for name, hits in self._edges.items()}
+        cache = getCacheInfo()
+        if cache is not None:
+            cache = {name: info._asdict() for name, info in cache.items()}
+        return {'functions': functions, 'edges': edges, 'cache': cache}
+    
+    def _key(self, name):
+        code = (self._originals[name] if hasattr(self, '_originals') else globals()[name]).__code__
+        return (code.co_filename, code.co_firstlineno, name)
+    
+    def create_stats(self):
+        """ 
+        Creates the attribute stats in the format of cProfile.Profile, which is used by pstats.Stats(profiler).
+        """ 
+        self.stats = {}
+        for name in self._calls:
+            callers = {('~', 0, '<outside>') if caller is None else self._key(caller): (c[0], c[0], c[1], c[2]) 
+                       for caller, c in self._callers[name].items()}
+            self.stats[self._key(name)] = (self._calls[name], self._calls[name], self._tottime[name], 
+                                           self._cumtime[name], callers)
+            
+    def printStats(self, sort='cumulative', stream=None):
+        """ 
+        Prints the statistics of the instrumented functions with the pstats module, followed by the 
+        number of short-circuits and the cache statistics.
+        
+        Parameters:
+            sort (str): Sort key of pstats.Stats.sort_stats, e.g. 'cumulative', 'tottime' or 'calls'.
+            stream (file): Output stream. If None, sys.stdout is used.
+        """ 
+        import pstats
+        stream = sys.stdout if stream is None else stream
+        if not self._calls:
+            print('No instrumented function was called.', file=stream)
+        else:
+            pstats.Stats(self, stream=stream).sort_stats(sort).print_stats()
+        stats = self.getStats()
+        for name, hits in stats['edges'].items():
+            print(f"{name}: mos==low {hits['mos==low']}, mos==high {hits['mos==high']}", file=stream)
+        if stats['cache'] is not None:
+            for name, info in stats['cache'].items():
+                print(f'cache {name}: {info}', file=stream)
+    
+    def dumpStats(self, filename):
+        """ 
+        Writes the statistics of the instrumented functions to a file in the format of cProfile.Profile.dump_stats, 
+        which can be read by pstats.Stats(filename) and by viewers for cProfile output.
+        """ 
+        import marshal
+        self.create_stats()
+        with open(filename, 'wb') as fp:
+            marshal.dump(self.stats, fp)
+
+def enableProfiling():
+    """ 
+    Enables the instrumentation of the module with a new Profiler, see Profiler.
+    
+    Returns:
+        Profiler: Enabled profiler.
+        
+    Raises:
+        RuntimeError: If a profiler is already enabled.
+    """ 
+    return Profiler().enable()
+
+def disableProfiling():
+    """ 
+    Disables the instrumentation of the module and restores the original functions.
+    
+    Returns:
+        Profiler: Previously enabled profiler with the collected statistics, or None if no profiler was enabled.
+    """ 
+    profiler = _profiler
+    if profiler is not None:
+        profiler.disable()
+    return profiler
+
+def getProfilingInfo():
+    """ 
+    Returns the statistics of the enabled profiler, see Profiler.getStats.
+    
+    Returns:
+        dict: Statistics of the enabled profiler. None if profiling is disabled.
+    """ 
+    return None if _profiler is None else _profiler.getStats()
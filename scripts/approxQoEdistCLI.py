@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Command line tool which computes the QoE rating distribution and the QoE metrics
+in a system based on QoS measurements stored in csv or npy files. The files are
+streamed in chunks (npy files are memory-mapped), mapped to MOS values with a declared
+MOS mapping function and aggregated in parallel over the files.
+
+Example:
+    python approxQoEdistCLI.py day1.npy day2.npy --mapping exponential --coefficients 4 0.25 1 --workers 4 -o qoe.json
+
+The parameters may also be provided in a json config file, e.g.
+    {"mapping": "exponential", "coefficients": [4, 0.25, 1], "low": 1, "high": 5, "sos_parameter": 0.25}
+Parameters given on the command line take precedence over the config file.
+
+This tool is published under the license CC BY-SA 4.0 at
+https://github.com/hossfeld/approx-qoe-distribution
+
+The following paper is to be cited in the bibliography whenever the tool is used.
+[QoEMAN2020]
+    Tobias Hossfeld, Poul E. Heegaard, Martin Varela, Lea Skorin-Kapov, Markus Fiedler.
+    "From QoS Distributions to QoE Distributions: a System's Perspective".
+    4th International Workshop on Quality of Experience Management (QoE Management 2020),
+    featured by IEEE Conference on Network Softwarization (IEEE NetSoft 2020), Ghent, Belgium.
+"""
+
+import argparse
+import json
+import sys
+import time
+import approxQoEdist as app
+
+#%% default parameters which are overwritten by the config file and the command line
+defaults = {'column': None, 'mapping': 'exponential', 'coefficients': [4, 0.25, 1],
+            'sos_parameter': 0.25, 'low': 1, 'high': 5, 'pow': 2.5, 'gob': 3.5,
+            'chunksize': 1000000, 'workers': 0, 'output': None, 'format': None, 'quiet': False}
+
+def positiveInt(value):
+    """
+    Converts a command line argument to a positive integer.
+    """
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+    return n
+
+def nonNegativeInt(value):
+    """
+    Converts a command line argument to a non-negative integer.
+    """
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f'{value} is not a non-negative integer')
+    return n
+
+def createParser():
+    """
+    Returns the parser of the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description='Computes the QoE distribution and QoE metrics in a system '
+                                     'from QoS measurements in csv or npy files.', argument_default=argparse.SUPPRESS)
+    parser.add_argument('inputs', nargs='+', help='csv or npy files with QoS measurements, each processed as one shard')
+    parser.add_argument('--config', help='json file with parameters; command line arguments take precedence')
+    parser.add_argument('--column', help='column of the QoS values in csv files with header (default: first column of csv files without header)')
+    parser.add_argument('--mapping', choices=sorted(app.MOSMapping.numberOfCoefficients), help='MOS mapping function (default: exponential)')
+    parser.add_argument('--coefficients', type=float, nargs='*', help='coefficients of the MOS mapping function (default: 4 0.25 1)')
+    parser.add_argument('--sos-parameter', dest='sos_parameter', type=float, help='SOS parameter in [0;1] (default: 0.25)')
+    parser.add_argument('--low', type=int, help='lower bound of the rating scale (default: 1)')
+    parser.add_argument('--high', type=int, help='upper bound of the rating scale (default: 5)')
+    parser.add_argument('--pow', type=float, help='threshold for poor or worse (default: 2.5)')
+    parser.add_argument('--gob', type=float, help='threshold for good or better (default: 3.5)')
+    parser.add_argument('--chunksize', type=positiveInt, help='number of QoS values processed at once (default: 1000000)')
+    parser.add_argument('--workers', type=nonNegativeInt, help='number of worker processes; 0 runs serially (default: 0)')
+    parser.add_argument('-o', '--output', help='output file; the format is derived from the extension (default: stdout)')
+    parser.add_argument('--format', choices=['csv', 'json'], help='output format (default: json)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print the progress and throughput summary')
+    return parser
+
+def parseArguments(parser, argv=None):
+    """
+    Parses the command line arguments and merges them with the config file and the default parameters.
+
+    Parameters:
+        parser (argparse.ArgumentParser): Parser of the command line arguments, see createParser.
+        argv (list): List of command line arguments. If None, sys.argv is used.
+
+    Returns:
+        argparse.Namespace: Parameters of the computation.
+    """
+    args = vars(parser.parse_args(argv))
+
+    params = dict(defaults)
+    if 'config' in args:
+        with open(args.pop('config')) as fp:
+            config = json.load(fp)
+        unknown = set(config) - set(defaults)
+        if unknown:
+            parser.error(f'unknown parameters in config file: {sorted(unknown)}')
+        params.update(config)
+    params.update(args)
+    for name, check in (('chunksize', positiveInt), ('workers', nonNegativeInt)):
+        try:
+            params[name] = check(params[name])
+        except (TypeError, ValueError, argparse.ArgumentTypeError) as e:
+            parser.error(f'parameter {name}: {e}')
+    if params['format'] is None:
+        params['format'] = 'csv' if params['output'] is not None and params['output'].endswith('.csv') else 'json'
+    return argparse.Namespace(**params)
+
+def checkInputs(parser, args):
+    """
+    Checks that the input files exist and that the csv files match the option --column: without --column, 
+    the first line must contain a QoS value; with --column, the header must contain the column.
+    Terminates the tool with an error message otherwise.
+    """
+    for path in args.inputs:
+        try:
+            with open(path, 'rb') as fp:
+                first = fp.readline().decode(errors='replace').strip()
+        except OSError as e:
+            parser.error(str(e))
+        if path.endswith('.npy'):
+            continue
+        fields = [field.strip().strip('"') for field in first.split(',')]
+        if args.column is None:
+            try:
+                float(fields[0])
+            except ValueError:
+                parser.error(f'{path}: first line {first!r} contains no QoS value; use --column for csv files with header')
+        elif args.column not in fields:
+            parser.error(f'{path}: column {args.column!r} not found in header {first!r}')
+
+def getResult(acc):
+    """
+    Returns the QoE metrics of the system and the QoE distribution as dictionary.
+
+    Parameters:
+        acc (SystemQoEAccumulator): Accumulator with the sums of all QoS measurements.
+
+    Returns:
+        dict: Number of QoS values, MOS, PoW, GoB and the probabilities of the rating scale.
+    """
+    xk, pk, mos, pow_val, gob_val = acc.getSystemQoE()
+    result = {'count': int(acc.count), 'mos': float(mos), 'pow': float(pow_val), 'gob': float(gob_val)}
+    result.update({f'p{x}': float(p) for x, p in zip(xk, pk)})
+    return result
+
+def writeResult(result, output=None, fmt='json'):
+    """
+    Writes the result as json or csv to the output file or to stdout if output is None.
+    """
+    fp = sys.stdout if output is None else open(output, 'w', newline='')
+    try:
+        if fmt == 'csv':
+            fp.write(','.join(result) + '\n')
+            fp.write(','.join(repr(v) for v in result.values()) + '\n')
+        else:
+            json.dump(result, fp, indent=2)
+            fp.write('\n')
+    finally:
+        if output is not None:
+            fp.close()
+
+#%% main program
+def main(argv=None):
+    """
+    Runs the command line tool. Returns the exit code. Invalid input data or parameters terminate 
+    the tool with a one-line error message and exit code 2.
+    """
+    parser = createParser()
+    args = parseArguments(parser, argv)
+    checkInputs(parser, args)
+    start = time.perf_counter()
+
+    def progress(i, state):
+        if not args.quiet:
+            elapsed = time.perf_counter() - start
+            print(f'[{i+1}/{len(args.inputs)}] {args.inputs[i]}: {state["count"]} samples ({elapsed:.2f} s)', file=sys.stderr)
+
+    try:
+        f = app.MOSMapping(args.mapping, args.coefficients)
+        acc = app.accumulateShards(args.inputs, f, sos_parameter=args.sos_parameter, low=args.low, high=args.high,
+                                   PoW=args.pow, GoB=args.gob, workers=args.workers, chunksize=args.chunksize,
+                                   column=args.column, progress=progress)
+        result = getResult(acc)
+    except (ValueError, OSError) as e:
+        # e.g. MOS values out of the rating scale or invalid QoS values in the input files
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    writeResult(result, args.output, args.format)
+
+    if not args.quiet:
+        print(f'Processed {acc.count} samples from {len(args.inputs)} files in {elapsed:.2f} s '
+              f'({acc.count/max(elapsed, 1e-12):.0f} samples/s)', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the functions in approxQoEdist.py for synthetic inputs of increasing size.
+For each function and input size, the wall time (minimum and median over several repetitions)
+and the peak memory allocated during a call (measured with tracemalloc) are recorded. The
+results are stored as json file together with the git commit and the library versions,
+so that two runs, e.g. before and after a change, can be compared.
+
+Example:
+    python benchmarkApproxQoEdist.py -o before.json
+    ... change approxQoEdist.py ...
+    python benchmarkApproxQoEdist.py -o after.json --compare before.json
+
+The number of samples is the number of MOS values for getBetaParams, getBetaCDF, getPoW, getGoB,
+getDiscreteDistributionArrays and getDiscreteDistribution, which are called once per MOS value, the number
+of ratings for calcSOSParameter, and the number of QoS measurements for the end-to-end computation.
+Sizes whose estimated time exceeds the time budget are skipped and recorded as skipped, as well as
+benchmarks of functions which are not available in the version of approxQoEdist.py under test.
+
+This tool is published under the license CC BY-SA 4.0 at
+https://github.com/hossfeld/approx-qoe-distribution
+
+The following paper is to be cited in the bibliography whenever the tool is used.
+[QoEMAN2020]
+    Tobias Hossfeld, Poul E. Heegaard, Martin Varela, Lea Skorin-Kapov, Markus Fiedler.
+    "From QoS Distributions to QoE Distributions: a System's Perspective".
+    4th International Workshop on Quality of Experience Management (QoE Management 2020),
+    featured by IEEE Conference on Network Softwarization (IEEE NetSoft 2020), Ghent, Belgium.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import scipy
+import approxQoEdist as app
+
+#%% synthetic inputs
+RATINGS_PER_CONDITION = 25
+
+def f(x):
+    """ MOS mapping function of the page load time example in exampleQoSMeasurementsToQoEdist.py """
+    return 4*np.exp(-0.25*x)+1
+
+def makeMOS(n, rng):
+    return rng.uniform(1, 5, n)
+
+def makeRatings(n, rng):
+    """ Returns n ratings of n/RATINGS_PER_CONDITION test conditions as matrix and as DataFrame. """
+    conditions = max(n // RATINGS_PER_CONDITION, 1)
+    mos = rng.uniform(1, 5, (conditions, 1))
+    # binomial ratings on [1;5] with mean mos and SOS parameter 0.25
+    y = 1.0 + rng.binomial(4, (mos-1)/4, (conditions, RATINGS_PER_CONDITION))
+    df = pd.DataFrame({'condition': np.repeat(np.arange(conditions), RATINGS_PER_CONDITION), 'rating': y.ravel()})
+    return y, df
+
+def makeQoS(n, rng):
+    return np.abs(rng.standard_normal(n)*2+8.6)
+
+#%% benchmarked functions: name -> (setup function for n samples, benchmarked function of the setup result)
+def loop(func):
+    """ Calls func once per MOS value as in a per-sample Python loop. """
+    def run(mos):
+        for m in mos:
+            func(m)
+    return run
+
+benchmarks = {
+    'getBetaParams': (lambda n, rng: makeMOS(n, rng).tolist(), loop(lambda m: app.getBetaParams(m, 0.25))),
+    'getBetaCDF': (lambda n, rng: makeMOS(n, rng).tolist(), loop(lambda m: app.getBetaCDF(2.5, m, 0.25))),
+    'getPoW': (lambda n, rng: makeMOS(n, rng).tolist(), loop(lambda m: app.getPoW(m, 0.25))),
+    'getGoB': (lambda n, rng: makeMOS(n, rng).tolist(), loop(lambda m: app.getGoB(m, 0.25))),
+    'getDiscreteDistributionArrays': (lambda n, rng: makeMOS(n, rng).tolist(),
+                                      loop(lambda m: app.getDiscreteDistributionArrays(m, 0.25))),
+    'getDiscreteDistribution': (lambda n, rng: makeMOS(n, rng).tolist(),
+                                loop(lambda m: app.getDiscreteDistribution(m, 0.25))),
+    'calcSOSParameter[ndarray]': (lambda n, rng: makeRatings(n, rng)[0], app.calcSOSParameter),
+    'calcSOSParameter[DataFrame]': (lambda n, rng: makeRatings(n, rng)[1], app.calcSOSParameter),
+    'endToEnd[loop]': (makeQoS, lambda qos: endToEndLoop(qos)),
+    'getQoEArraysBatch': (makeMOS, lambda mos: app.getQoEArraysBatch(mos, 0.25)),
+    'getSystemQoE': (makeQoS, lambda qos: app.getSystemQoE(qos, f)),
+    'getSystemQoE[table]': (makeQoS, lambda qos: app.getSystemQoE(qos, f, table=lookupTable)),
+}
+lookupTable = None
+
+# functions required by the benchmarks which are not available in all versions of the module; the benchmarks 
+# are skipped for versions without these functions, so that the benchmark also runs against earlier commits
+requirements = {'getQoEArraysBatch': ['getQoEArraysBatch'], 'getSystemQoE': ['getSystemQoE'], 
+                'getSystemQoE[table]': ['getSystemQoE', 'BetaLookupTable']}
+
+def endToEndLoop(qos):
+    """ QoE distribution, PoW and GoB in the system computed per QoS value as in exampleQoSMeasurementsToQoEdist.py """
+    pk = np.zeros(5)
+    for mos in f(qos):
+        pk += app.getDiscreteDistributionArrays(mos)[1]
+    pow_vals = np.array([app.getPoW(mos) for mos in f(qos)])
+    gob_vals = np.array([app.getGoB(mos) for mos in f(qos)])
+    return pk/len(qos), pow_vals.mean(), gob_vals.mean()
+
+#%% measurement
+def measure(run, data, repeat):
+    """
+    Returns the wall times of repeat calls run(data) in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(data)
+        times.append(time.perf_counter() - start)
+    return times
+
+def measurePeakMemory(run, data):
+    """
+    Returns the peak memory in bytes which is allocated during the call run(data), excluding the input data.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def runBenchmarks(names, sizes, repeat=3, budget=60.0, memory=True, seed=1, verbose=True):
+    """
+    Runs the benchmarks for the given input sizes.
+
+    Parameters:
+        names (list): Names of the benchmarks, see benchmarks.
+        sizes (list): Input sizes in ascending order.
+        repeat (int): Number of timed repetitions per benchmark and size.
+        budget (float): Time budget in seconds per benchmark and size. A size is skipped if the time
+            extrapolated linearly from the previous size exceeds the budget.
+        memory (bool): If True, the peak memory is measured in an additional call.
+        seed (int): Seed of the random number generator for the synthetic inputs.
+        verbose (bool): If True, the results are printed to stderr.
+
+    Returns:
+        list: One dictionary per benchmark and size.
+    """
+    global lookupTable
+    if hasattr(app, 'BetaLookupTable'):
+        lookupTable = app.BetaLookupTable()
+    results = []
+    for name in names:
+        missing = [func for func in requirements.get(name, []) if not hasattr(app, func)]
+        if missing:
+            results += [dict(name=name, size=int(n), skipped=True, reason=f'not available: {missing}') for n in sizes]
+            if verbose:
+                print(f'{name:32s} skipped, not available in this version: {missing}', file=sys.stderr)
+            continue
+        setup, run = benchmarks[name]
+        run(setup(10, np.random.default_rng(seed))) # warm-up, e.g. lazy imports
+        previous = None
+        for n in sizes:
+            result = dict(name=name, size=int(n))
+            if previous is not None and previous[1]*n/previous[0] > budget:
+                result.update(skipped=True, reason='time budget')
+            else:
+                data = setup(n, np.random.default_rng(seed))
+                times = measure(run, data, repeat)
+                result.update(skipped=False, repeat=repeat, time_min=min(times), time_median=float(np.median(times)),
+                              time_per_sample=min(times)/n)
+                if memory:
+                    result.update(peak_memory=measurePeakMemory(run, data))
+                previous = (n, min(times))
+                del data
+            results.append(result)
+            if verbose:
+                print(formatResult(result), file=sys.stderr)
+    return results
+
+def formatResult(result):
+    if result['skipped']:
+        return f"{result['name']:32s} {result['size']:>10d}   skipped"
+    memory = f"{result['peak_memory']/2**20:10.2f} MiB" if 'peak_memory' in result else ''
+    return f"{result['name']:32s} {result['size']:>10d} {result['time_min']:12.6f} s {memory}"
+
+#%% metadata and comparison of two runs
+def getMetadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return dict(commit=commit, date=datetime.datetime.now().isoformat(timespec='seconds'),
+                python=platform.python_version(), numpy=np.__version__, scipy=scipy.__version__,
+                pandas=pd.__version__, platform=platform.platform(), processor=platform.processor())
+
+def compareResults(base, results):
+    """
+    Prints the ratio of the wall times and peak memory of the results to the base results for
+    each benchmark and size contained in both runs. A ratio smaller than 1 is an improvement.
+    """
+    baseResults = {(r['name'], r['size']): r for r in base['results'] if not r['skipped']}
+    print(f"{'benchmark':32s} {'size':>10s} {'time':>10s} {'memory':>10s}")
+    for r in results:
+        b = baseResults.get((r['name'], r['size']))
+        if b is None or r['skipped']:
+            continue
+        memory = f"{r['peak_memory']/max(b['peak_memory'], 1):10.2f}" if 'peak_memory' in r and 'peak_memory' in b else ''
+        print(f"{r['name']:32s} {r['size']:>10d} {r['time_min']/b['time_min']:10.2f} {memory}")
+
+#%% main program
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of approxQoEdist.py for synthetic inputs.')
+    parser.add_argument('-o', '--output', help='json file for the results (default: benchmark_<commit>.json)')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(benchmarks), default=list(benchmarks),
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**k for k in range(2, 8)],
+                        help='number of samples (default: 10^2 to 10^7)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed repetitions per benchmark and size (default: 3)')
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help='time budget in seconds per benchmark and size; larger sizes are skipped (default: 60)')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='do not measure the peak memory')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the synthetic inputs (default: 1)')
+    parser.add_argument('--compare', help='json file of a previous run to compare with')
+    args = parser.parse_args(argv)
+
+    metadata = getMetadata()
+    if hasattr(app, 'disableCache'):
+        app.disableCache()
+    results = runBenchmarks(args.benchmarks, sorted(args.sizes), repeat=args.repeat, budget=args.budget,
+                            memory=args.memory, seed=args.seed)
+    output = args.output or f"benchmark_{metadata['commit'] or 'unknown'}.json"
+    with open(output, 'w') as fp:
+        json.dump(dict(metadata=metadata, results=results), fp, indent=1)
+    print(f'Results written to {output}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compareResults(json.load(fp), results)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,6 +30,18 @@ df = pd.read_csv('exampleDataFrame.csv')
 a = app.calcSOSParameter(df)
 print(a)
 
+#%% bootstrap confidence interval of the SOS parameter a
+_, (a_lower, a_upper), _ = app.calcSOSParameterBootstrap(df, replicates=1000, seed=1)
+print(f'95% confidence interval of SOS parameter: [{a_lower:.3f};{a_upper:.3f}]')
+
+#%% maximum likelihood estimate of the SOS parameter a based on the rating counts, with standard error
+a_ml, a_se = app.calcSOSParameterML(df)
+print(f'maximum likelihood estimate of SOS parameter: {a_ml:.3f} (standard error {a_se:.3f})')
+
+#%% read the same data in chunks, e.g. for large rating logs which do not fit into memory
+est = app.SOSParameterEstimator().addCSV('exampleDataFrame.csv', chunksize=500)
+print(est.calcSOSParameter())
+
 #%% read data from a array provided in a csv file on a 5-point scale
 # y = np.genfromtxt('exampleArray.csv', delimiter=',')
 # print(app.calcSOSParameter(y))    
@@ -64,9 +76,10 @@ plt.grid(which='major')
 plt.figure(2)
 plt.clf()
 x = np.linspace(1,5,100)
-for mos in np.arange(1.5, 5, step=0.5):
-    rv = app.getBetaDistribution(mos=mos, sos_parameter=a)
-    plt.plot(x, rv.cdf(x), label=mos)
+mosValues = np.arange(1.5, 5, step=0.5)
+sweep = app.sweepParameters(mos=mosValues, sos_parameter=a, x=x) # CDF for all MOS values and x at once
+for k, mos in enumerate(mosValues):
+    plt.plot(x, sweep['cdf'][0,0,k], label=mos)
     
 plt.xlabel('user rating')    
 plt.ylabel('CDF')    
@@ -81,10 +94,9 @@ i = np.arange(1,6)
 sosa = 0.1
 mosValues = np.arange(1.5, 5, step=0.5)
 w = 0.9/len(mosValues) # width of the bar plots
+sweep = app.sweepParameters(mos=mosValues, sos_parameter=sosa) # discrete distributions for all MOS values
 for k, mos in enumerate(mosValues):
-    rv = app.getDiscreteDistribution(mos=mos, sos_parameter=sosa)
-    #plt.plot(i, rv.pmf(i), 'o:', label=mos)
-    plt.bar(i+k*w, rv.pmf(i), width=w, label=mos, zorder=2)
+    plt.bar(i+k*w, sweep['pk'][0,0,k], width=w, label=mos, zorder=2)
     
 plt.xlabel('user rating')    
 plt.ylabel('probability')    
@@ -35,12 +35,9 @@ plt.ylabel('MOS')
 plt.grid(which='major')
 
 #%% Derive QoE distribution in the system using a discrete 5-point scale
-xk = np.arange(1,6) # The (discrete) QoE ratings (1,2,3,4,5)
-pk = np.zeros(5) # Probability for QoE rating in the system 
-for mos in f(qos):
-    xkmos, pkmos = app.getDiscreteDistributionArrays(mos)
-    pk += pkmos
-pk /= len(qos)     
+# QoE ratings xk, probability pk for QoE rating in the system and the QoE metrics E[Q], PoW, GoB 
+# are derived at once from the QoS measurements and the mapping function
+xk, pk, EQ, powQ, gobQ = app.getSystemQoE(qos, f)
 
 #%% Plot the QoE distribution and relevant QoE metrics
 plt.figure(11)
@@ -55,19 +52,17 @@ plt.ylabel('CDF')
 # In 2019 Eleventh Int. Conf. on Quality of Multimedia Experience (QoMEX) (pp. 1-6). IEEE.
 
 mos_vals = f(qos)
-print(f'Expected system QoE: E[Q]={(pk*xk).sum():.2f} vs. E[f(qos)]={mos_vals.mean():.2f}')
+print(f'Expected system QoE: E[Q]={EQ:.2f} vs. E[f(qos)]={mos_vals.mean():.2f}')
 plt.plot([mos_vals.mean()]*2, [0, 1], 'k--', label=f'MOS={mos_vals.mean():.2f}')
 plt.text(mos_vals.mean(),1, 'MOS')
 plt.gca().tick_params(right=True, top=True, labeltop=True)
 
-pow_vals = np.array([app.getPoW(mos) for mos in f(qos)])
-print(f'Poor or worse ratio in the system: PoW[Q]={pk[:2].sum():.2f} vs. E[w(qos)]={pow_vals.mean():.2f}')
-plt.plot([0.5,5.5], [pow_vals.mean()]*2, 'r--', label=f'PoW={pow_vals.mean():.2f}')
-plt.fill_between([0.5,5.5], 0, [pow_vals.mean()]*2, color='r', alpha=0.5, zorder=-1, hatch='--')
+print(f'Poor or worse ratio in the system: PoW[Q]={pk[:2].sum():.2f} vs. E[w(qos)]={powQ:.2f}')
+plt.plot([0.5,5.5], [powQ]*2, 'r--', label=f'PoW={powQ:.2f}')
+plt.fill_between([0.5,5.5], 0, [powQ]*2, color='r', alpha=0.5, zorder=-1, hatch='--')
 
-gob_vals = np.array([app.getGoB(mos) for mos in f(qos)])
-print(f'Good or better ratio in the system: GoB[Q]={pk[-2:].sum():.2f} vs. E[g(qos)]={gob_vals.mean():.2f}')
-plt.plot([0.5,5.5], [1-gob_vals.mean()]*2, 'g--', label=f'GoB={gob_vals.mean():.2f}')
-plt.fill_between([0.5,5.5], [1-gob_vals.mean()]*2, 1, color='g', alpha=0.5, zorder=-1, hatch='--')
+print(f'Good or better ratio in the system: GoB[Q]={pk[-2:].sum():.2f} vs. E[g(qos)]={gobQ:.2f}')
+plt.plot([0.5,5.5], [1-gobQ]*2, 'g--', label=f'GoB={gobQ:.2f}')
+plt.fill_between([0.5,5.5], [1-gobQ]*2, 1, color='g', alpha=0.5, zorder=-1, hatch='--')
 
 plt.legend()
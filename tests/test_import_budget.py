@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Checks that approxQoEdist.py loads fast, i.e. that scipy and pandas are only imported on first use.
+The import is measured in a fresh interpreter, since the modules may already be loaded in the test process.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+# time for importing approxQoEdist on top of numpy; importing scipy.stats alone takes several hundred ms
+IMPORT_BUDGET = 0.1
+
+def importInFreshInterpreter():
+    code = ("import sys, time, json\n"
+            "import numpy\n"
+            "start = time.perf_counter()\n"
+            "import approxQoEdist\n"
+            "elapsed = time.perf_counter() - start\n"
+            "print(json.dumps({'time': elapsed, 'modules': sorted(sys.modules)}))\n")
+    result = subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def test_no_heavy_imports():
+    modules = importInFreshInterpreter()['modules']
+    for name in ('scipy.stats', 'scipy.special', 'pandas'):
+        assert name not in modules, f'{name} is imported when loading approxQoEdist'
+
+def test_import_time_budget():
+    # best of several runs to reduce the influence of a busy machine
+    elapsed = min(importInFreshInterpreter()['time'] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, f'importing approxQoEdist took {elapsed:.3f} s, budget is {IMPORT_BUDGET} s'
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Checks the maximum likelihood estimator calcSOSParameterML of the SOS parameter.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+import approxQoEdist as app
+
+def test_missing_conditions_are_skipped():
+    df = pd.DataFrame({'condition': [1, 1, None, 2, 2, 3, 3, 3], 'rating': [2, 3, 4, 4, 5, 1, 3, 2]})
+    np.testing.assert_equal(app.calcSOSParameterML(df), app.calcSOSParameterML(df.dropna()))
+
+def test_dataframe_and_array_agree():
+    rng = np.random.default_rng(1)
+    y = 1.0 + rng.binomial(4, rng.uniform(0.1, 0.9, (20, 1)), (20, 15))
+    df = pd.DataFrame({'condition': np.repeat(np.arange(20), 15), 'rating': y.ravel()})
+    np.testing.assert_allclose(app.calcSOSParameterML(df), app.calcSOSParameterML(y))
+    a, se = app.calcSOSParameterML([y, y[:10]])
+    np.testing.assert_allclose(a[0], app.calcSOSParameterML(y)[0])
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the hopping and sliding windows of SystemQoEWindow with a brute-force computation
+over all accepted measurements, including measurements arriving out of order within the lateness.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+import approxQoEdist as app
+
+def bruteForce(batches, window, step, lateness):
+    """ Returns the accepted measurements, the expected hopping windows and the final watermark (bucket=1). """
+    wm, accepted = None, []
+    for t, v in batches:
+        ids = np.floor(t).astype(int)
+        keep = np.ones(len(t), bool) if wm is None else ids >= wm - lateness
+        accepted += list(zip(ids[keep], v[keep]))
+        if keep.any():
+            wm = ids[keep].max() if wm is None else max(wm, ids[keep].max())
+    ids, values = np.array([i for i, _ in accepted]), np.array([v for _, v in accepted])
+    windows = []
+    for k in range((ids.min()-window)//step, wm//step + 1):
+        first, last = k*step, k*step+window
+        inside = (ids >= first) & (ids < last)
+        if last <= wm - lateness and inside.any():
+            windows.append((first, last, values[inside]))
+    return ids, values, windows, wm
+
+def check(batches, window, step, lateness):
+    w = app.SystemQoEWindow(window=window, step=step, lateness=lateness)
+    emitted = [r for t, v in batches for r in w.add(t, v)]
+    ids, values, expected, wm = bruteForce(batches, window, step, lateness)
+
+    assert [(a, b) for a, b, _ in emitted] == [(a, b) for a, b, _ in expected]
+    for (_, _, result), (_, _, v) in zip(emitted, expected):
+        xk, pk, mos, pow_val, gob_val = app.getSystemQoE(v, lambda x: x)
+        np.testing.assert_allclose(result[1], pk, atol=1e-12)
+        np.testing.assert_allclose(result[3:], (pow_val, gob_val), atol=1e-12)
+    assert w.dropped == sum(len(t) for t, _ in batches) - len(ids)
+
+    inside = ids > wm - window
+    assert w.count == inside.sum()
+    if inside.any():
+        np.testing.assert_allclose(w.getSystemQoE()[1], app.getSystemQoE(values[inside], lambda x: x)[1], atol=1e-12)
+
+def test_late_measurement_in_first_window():
+    batches = [(np.array([12.]), np.array([3.])), (np.array([9.]), np.array([2.])), (np.array([30.]), np.array([4.]))]
+    check(batches, window=5, step=5, lateness=3)
+    w = app.SystemQoEWindow(window=5, step=5, lateness=3)
+    emitted = [r for t, v in batches for r in w.add(t, v)]
+    assert [(a, b) for a, b, _ in emitted] == [(5, 10), (10, 15)]
+
+@pytest.mark.parametrize('window, step, lateness', [(5, 5, 0), (5, 5, 3), (6, 2, 4), (4, 6, 2), (10, 3, 7)])
+def test_random_out_of_order(window, step, lateness):
+    rng = np.random.default_rng(window*100+step*10+lateness)
+    for _ in range(20):
+        t = np.sort(rng.uniform(0, 60, 200)) + rng.uniform(-2*lateness-1, 1, 200)
+        v = rng.uniform(1, 5, 200)
+        batches = [(t[i:i+j], v[i:i+j]) for i, j in zip(range(0, 200, 7), rng.integers(1, 8, 29))]
+        check(batches, window, step, lateness)
+
+def test_datetime_bounds():
+    w = app.SystemQoEWindow(window=60, step=60)
+    t = np.datetime64('2024-01-01T00:00:00') + np.arange(0, 200, 7).astype('timedelta64[s]')
+    emitted = w.add(t, np.full(len(t), 3.0))
+    start = np.datetime64('2024-01-01T00:00:00')
+    assert [(a, b) for a, b, _ in emitted] == [(start + np.timedelta64(60*k, 's'), start + np.timedelta64(60*(k+1), 's')) 
+                                               for k in range(3)]
+    assert all(a.dtype == np.dtype('datetime64[ns]') for a, _, _ in emitted)